@@ -175,6 +175,8 @@ def prepare_wheel(sources_path):
   copy_to_jaxlib(r.Rlocation("__main__/jaxlib/init.py"),
                  dst_filename="__init__.py")
   copy_to_jaxlib(r.Rlocation("__main__/jaxlib/cpu_feature_guard.so"))
+  copy_to_jaxlib(r.Rlocation("__main__/jaxlib/_cpu_prng.so"))
+  copy_to_jaxlib(r.Rlocation("__main__/jaxlib/cpu_prng.py"))
   copy_to_jaxlib(r.Rlocation("__main__/jaxlib/lapack.py"))
   copy_to_jaxlib(r.Rlocation("__main__/jaxlib/_lapack.so"))
   copy_to_jaxlib(r.Rlocation("__main__/jaxlib/_pocketfft.so"))
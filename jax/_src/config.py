@@ -512,6 +512,17 @@ enable_custom_prng = config.define_bool_state(
           'disabling it will be considered deprecated. In a version '
           'after that the flag will be removed altogether.'))
 
+threefry_partitionable = config.define_bool_state(
+    name='jax_threefry_partitionable',
+    default=False,
+    help=('Enables generating threefry random bits from a single key with '
+          'XLA\'s RngBitGenerator op (using its THREE_FRY algorithm), which '
+          'XLA can partition, instead of the hash computation built by JAX, '
+          'for computations placed on TPU. This changes the random streams: '
+          'on TPU the same key gives different values than with the flag '
+          'off. Keys batched with vmap, and computations placed on other '
+          'platforms, keep using the default hash.'))
+
 hlo_source_file_canonicalization_regex = config.define_string_state(
     name='jax_hlo_source_file_canonicalization_regex',
     default=None,
@@ -1719,6 +1719,9 @@ def full(shape: Shape, fill_value: Array, dtype: Optional[DType] = None) -> Arra
     raise TypeError(msg.format(np.shape(fill_value)))
   weak_type = dtype is None and dtypes.is_weakly_typed(fill_value)
   dtype = dtypes.canonicalize_dtype(dtype or _dtype(fill_value))
+  if all(core.is_constant_dim(d) for d in shape) and core.is_empty_shape(shape):
+    # There is nothing to fill, so skip compiling and dispatching a broadcast.
+    return _device_put_raw(np.zeros(shape, dtype), weak_type=weak_type)
   fill_value = _convert_element_type(fill_value, dtype, weak_type)
   return broadcast(fill_value, shape)
 
@@ -21,9 +21,9 @@ import warnings
 from typing import Optional
 
 __all__ = [
-  'cuda_linalg', 'cuda_prng', 'cusolver', 'rocsolver', 'jaxlib', 'lapack',
-  'pocketfft', 'pytree', 'tpu_driver_client', 'version', 'xla_client',
-  'xla_extension',
+  'cpu_prng', 'cuda_linalg', 'cuda_prng', 'cusolver', 'rocsolver', 'jaxlib',
+  'lapack', 'pocketfft', 'pytree', 'tpu_driver_client', 'version',
+  'xla_client', 'xla_extension',
 ]
 
 # First, before attempting to import jaxlib, warn about experimental machine
@@ -80,6 +80,12 @@ pytree = xla_client._xla.pytree
 jax_jit = xla_client._xla.jax_jit
 pmap_lib = xla_client._xla.pmap_lib
 
+# Only present in jaxlib builds that include the native CPU Threefry kernel.
+try:
+  from jaxlib import cpu_prng  # pytype: disable=import-error
+except ImportError:
+  cpu_prng = None
+
 try:
   from jaxlib import cusolver  # pytype: disable=import-error
 except ImportError:
@@ -1418,14 +1418,14 @@ def rot90(m, k=1, axes=(0, 1)):
   if k == 0:
     return m
   elif k == 2:
-    return flip(flip(m, ax1), ax2)
+    return lax.rev(m, (ax1, ax2))
   else:
     perm = list(range(m.ndim))
     perm[ax1], perm[ax2] = perm[ax2], perm[ax1]
     if k == 1:
-      return transpose(flip(m, ax2), perm)
+      return lax.transpose(lax.rev(m, (ax2,)), perm)
     else:
-      return flip(transpose(m, perm), ax2)
+      return lax.rev(lax.transpose(m, perm), (ax2,))
 
 
 @_wraps(np.flip, lax_description=_ARRAY_VIEW_DOC)
@@ -2249,9 +2249,14 @@ def _split(op, ary, indices_or_sections, axis=0):
            + ((r + 1) * (part_size + 1) - 1)])
     else:
       raise ValueError("array split does not result in an equal division")
-  starts, ends = [0] * ndim(ary), shape(ary)
+  # Static start indices would make each chunk a distinct slice primitive, so
+  # op-by-op mode would compile a separate executable per chunk. As operands
+  # of dynamic_slice, equally sized chunks share one executable; under jit XLA
+  # folds the constant indices back into static slices.
+  starts, sizes = [0] * ndim(ary), shape(ary)
   _subval = lambda x, i, v: subvals(x, [(i, v)])
-  return [lax.slice(ary, _subval(starts, axis, start), _subval(ends, axis, end))
+  return [lax.dynamic_slice(ary, _subval(starts, axis, int(start)),
+                            _subval(sizes, axis, int(end - start)))
           for start, end in zip(split_indices[:-1], split_indices[1:])]
 
 @_wraps(np.split, lax_description=_ARRAY_VIEW_DOC)
@@ -3476,7 +3481,7 @@ def block(arrays):
   return out
 
 @_wraps(np.atleast_1d, update_doc=False, lax_description=_ARRAY_VIEW_DOC)
-@jit
+@partial(jit, inline=True)
 def atleast_1d(*arys):
   if len(arys) == 1:
     arr = asarray(arys[0])
@@ -3486,7 +3491,7 @@ def atleast_1d(*arys):
 
 
 @_wraps(np.atleast_2d, update_doc=False, lax_description=_ARRAY_VIEW_DOC)
-@jit
+@partial(jit, inline=True)
 def atleast_2d(*arys):
   if len(arys) == 1:
     arr = asarray(arys[0])
@@ -3501,7 +3506,7 @@ def atleast_2d(*arys):
 
 
 @_wraps(np.atleast_3d, update_doc=False, lax_description=_ARRAY_VIEW_DOC)
-@jit
+@partial(jit, inline=True)
 def atleast_3d(*arys):
   if len(arys) == 1:
     arr = asarray(arys[0])
@@ -3692,6 +3697,13 @@ def eye(N, M=None, k=0, dtype=None):
   if N < 0 or M < 0:
     raise ValueError(f"negative dimensions are not allowed, got {N} and {M}")
   k = operator.index(k)
+  return _eye(N, M, k, dtype)
+
+# Jitted so that the two iotas, the comparison and the conversion fuse into one
+# kernel even when called eagerly, instead of materializing each N x M
+# intermediate op by op.
+@partial(jit, inline=True, static_argnames=('N', 'M', 'k', 'dtype'))
+def _eye(N, M, k, dtype):
   return lax._eye(dtype, (N, M), k)
 
 
@@ -3716,8 +3728,39 @@ def arange(start, stop=None, step=None, dtype=None):
     step = None if step is None else require(step, msg("step"))
     if dtype is None:
       dtype = _dtype(start, *(x for x in [stop, step] if x is not None))
+    if issubdtype(dtype, integer) and _all(
+        issubdtype(x.dtype, integer) for x in [start, stop, step]
+        if x is not None):
+      out = _integer_arange(start, stop, step, dtype)
+      if out is not None:
+        return out
     return array(np.arange(start, stop=stop, step=step, dtype=dtype))
 
+def _integer_arange(start, stop, step, dtype):
+  """Builds an integer arange from lax.iota, avoiding a host-side array.
+
+  Returns None if the values (or their offsets from `start`) do not fit in
+  `dtype`, in which case the caller falls back to np.arange.
+  """
+  dtype = dtypes.canonicalize_dtype(dtype)
+  start, step = int(start), 1 if step is None else int(step)
+  start, stop = (0, start) if stop is None else (start, int(stop))
+  if step == 0:
+    return None
+  values = range(start, stop, step)
+  if not values:
+    return lax.iota(dtype, 0)
+  lo, hi = _min(values[0], values[-1]), _max(values[0], values[-1])
+  info = iinfo(dtype)
+  if lo < info.min or hi > info.max or hi - lo > info.max:
+    return None
+  out = lax.iota(dtype, len(values))
+  if _abs(step) != 1:
+    out = lax.mul(out, _constant_like(out, _abs(step)))
+  if step < 0:
+    return lax.sub(_constant_like(out, start), out)
+  return lax.add(out, _constant_like(out, start)) if start else out
+
 
 def _wrap_numpy_nullary_function(f):
   """Adapts `f` to return a DeviceArray instead of an np.ndarray.
@@ -5136,11 +5179,16 @@ def vander(x, N=None, increasing=False):
   if N < 0:
     raise ValueError("N must be nonnegative")
 
-  iota = lax.iota(x.dtype, N)
-  if not increasing:
-    iota = lax.sub(lax._const(iota, N - 1), iota)
-
-  return power(x[..., None], expand_dims(iota, tuple(range(x.ndim))))
+  # Build the powers by cumulative multiplication, as np.vander does, rather
+  # than with an elementwise power.
+  if N <= 1:
+    out = lax.full((x.shape[0], N), 1, x.dtype)
+  else:
+    out = lax.concatenate(
+        [lax.full((x.shape[0], 1), 1, x.dtype),
+         lax.cumprod(lax.broadcast_in_dim(x, (x.shape[0], N - 1), (0,)), 1)],
+        1)
+  return out if increasing else lax.rev(out, (1,))
 
 
 ### Misc
@@ -5419,6 +5467,17 @@ def _take(a, indices, axis: Optional[int] = None, out=None, mode=None):
       raise IndexError("Cannot do a non-empty jnp.take() from an empty axis.")
     return a
 
+  # 64-bit indices double the index bandwidth of the gather. When the axis fits
+  # in int32, clamp to the range the gather's "clip" mode would use anyway (the
+  # "wrap" indices are already in range) and narrow the indices.
+  axis_size = a.shape[axis_idx]
+  if (_dtype(indices).itemsize == 8 and core.is_constant_dim(axis_size) and
+      axis_size <= np.iinfo(np.int32).max):
+    if mode != "wrap":
+      indices = lax.clamp(_constant_like(indices, 0), indices,
+                          _constant_like(indices, axis_size - 1))
+    indices = lax.convert_element_type(indices, np.int32)
+
   slice_sizes[axis_idx] = _min(indices.size, 1)
   dnums = lax.GatherDimensionNumbers(
     offset_dims=tuple(
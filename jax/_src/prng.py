@@ -21,6 +21,7 @@ import numpy as np
 
 from jax import lax
 from jax import core
+from jax import dtypes
 from jax import numpy as jnp
 from jax import tree_util
 from jax.config import config
@@ -30,6 +31,7 @@ from jax.interpreters import xla
 from jax._src.api import jit, vmap
 from jax._src.lib import xla_bridge
 from jax._src.lib import xla_client
+from jax._src.lib import cpu_prng
 from jax._src.lib import cuda_prng
 import jax._src.pretty_printer as pp
 from jax._src.util import prod
@@ -221,32 +223,34 @@ def threefry_seed(seed: int) -> jnp.ndarray:
   # This breaks JIT invariance for large ints, but supports the common
   # use-case of instantiating with Python hashes in X32 mode.
   if isinstance(seed, int):
-    seed_arr = jnp.asarray(np.int64(seed))
-  else:
-    seed_arr = jnp.asarray(seed)
+    seed = np.int64(seed)
+  if isinstance(seed, np.integer):
+    return _threefry_seed_concrete(seed)
+  seed_arr = jnp.asarray(seed)
   if seed_arr.shape:
     raise TypeError(f"PRNG key seed must be a scalar; got {seed!r}.")
   if not np.issubdtype(seed_arr.dtype, np.integer):
     raise TypeError(f"PRNG key seed must be an integer; got {seed!r}")
 
-  convert = lambda k: lax.reshape(lax.convert_element_type(k, np.uint32), [1])
-  k1 = convert(lax.shift_right_logical(seed_arr, lax._const(seed_arr, 32)))
-  k2 = convert(jnp.bitwise_and(seed_arr, np.uint32(0xFFFFFFFF)))
-  return lax.concatenate([k1, k2], 0)
+  return lax.concatenate(_threefry_seed_halves(seed_arr), 0)
+
 
+def _threefry_seed_concrete(seed: np.integer) -> jnp.ndarray:
+  # Host-side equivalent of the traced computation in threefry_seed, which
+  # would otherwise dispatch several scalar ops for every new key.
+  dtype = dtypes.canonicalize_dtype(seed.dtype)
+  value = int(np.asarray(seed).astype(dtype))
+  k1 = (value >> 32) & 0xFFFFFFFF if np.iinfo(dtype).bits == 64 else 0
+  k2 = value & 0xFFFFFFFF
+  return jnp.asarray(np.array([k1, k2], np.uint32))
 
-def _make_rotate_left(dtype):
-  if not jnp.issubdtype(dtype, np.integer):
-    raise TypeError("_rotate_left only accepts integer dtypes.")
-  nbits = np.array(jnp.iinfo(dtype).bits, dtype)
 
-  def _rotate_left(x, d):
-    if lax.dtype(d) != dtype:
-      d = lax.convert_element_type(d, dtype)
-    if lax.dtype(x) != dtype:
-      x = lax.convert_element_type(x, dtype)
-    return lax.shift_left(x, d) | lax.shift_right_logical(x, nbits - d)
-  return _rotate_left
+def _threefry_seed_halves(seed_arr):
+  # The high and low uint32 words of an integer scalar, each of shape (1,).
+  convert = lambda k: lax.reshape(lax.convert_element_type(k, np.uint32), [1])
+  k1 = convert(lax.shift_right_logical(seed_arr, lax._const(seed_arr, 32)))
+  k2 = convert(jnp.bitwise_and(seed_arr, np.uint32(0xFFFFFFFF)))
+  return [k1, k2]
 
 
 def _bit_stats(bits):
@@ -269,7 +273,19 @@ def _threefry2x32_abstract_eval(*args):
   return (aval,) * 2
 
 
-rotate_left = _make_rotate_left(np.uint32)
+def rotate_left(x, d):
+  # Rotates the uint32 `x` left by `d`, a uint32 constant or array. Constant
+  # rotation amounts stay NumPy scalars, so `32 - d` is folded at trace time.
+  return lax.shift_left(x, d) | lax.shift_right_logical(x, np.uint32(32) - d)
+
+
+# Threefry-2x32 constants, built once rather than on every trace: the key
+# schedule parity word, the rotation amounts of the even and odd round groups,
+# and the counters injected after each group of four rounds.
+_THREEFRY_PARITY = np.uint32(0x1BD11BDA)
+_THREEFRY_ROTATIONS = (np.array([13, 15, 26, 6], dtype=np.uint32),
+                       np.array([17, 29, 16, 24], dtype=np.uint32))
+_THREEFRY_INJECTIONS = tuple(np.uint32(i) for i in range(1, 6))
 
 
 def apply_round(v, rot):
@@ -288,7 +304,7 @@ def rolled_loop_step(i, state):
   x, ks, rotations = state
   for r in rotations[0]:
     x = apply_round(x, r)
-  new_x = [x[0] + ks[0], x[1] + ks[1] + jnp.asarray(i + 1, dtype=np.uint32)]
+  new_x = [x[0] + ks[0], x[1] + (ks[1] + jnp.asarray(i + 1, dtype=np.uint32))]
   return new_x, rotate_list(ks), rotate_list(rotations)
 
 
@@ -304,13 +320,15 @@ def _threefry2x32_lowering(key1, key2, x1, x2, use_rolled_loops=True):
   """
   x = [x1, x2]
 
-  rotations = [np.array([13, 15, 26, 6], dtype=np.uint32),
-               np.array([17, 29, 16, 24], dtype=np.uint32)]
-  ks = [key1, key2, key1 ^ key2 ^ np.uint32(0x1BD11BDA)]
+  rotations = list(_THREEFRY_ROTATIONS)
+  ks = [key1, key2, key1 ^ key2 ^ _THREEFRY_PARITY]
 
   x[0] = x[0] + ks[0]
   x[1] = x[1] + ks[1]
 
+  # The injected counters are added to the key words first (note the
+  # parentheses below): the keys are usually scalars, so this saves one
+  # count-sized addition per injection without changing the result.
   if use_rolled_loops:
     x, _, _ = lax.fori_loop(0, 5, rolled_loop_step, (x, rotate_list(ks), rotations))
 
@@ -318,32 +336,34 @@ def _threefry2x32_lowering(key1, key2, x1, x2, use_rolled_loops=True):
     for r in rotations[0]:
       x = apply_round(x, r)
     x[0] = x[0] + ks[1]
-    x[1] = x[1] + ks[2] + np.uint32(1)
+    x[1] = x[1] + (ks[2] + _THREEFRY_INJECTIONS[0])
 
     for r in rotations[1]:
       x = apply_round(x, r)
     x[0] = x[0] + ks[2]
-    x[1] = x[1] + ks[0] + np.uint32(2)
+    x[1] = x[1] + (ks[0] + _THREEFRY_INJECTIONS[1])
 
     for r in rotations[0]:
       x = apply_round(x, r)
     x[0] = x[0] + ks[0]
-    x[1] = x[1] + ks[1] + np.uint32(3)
+    x[1] = x[1] + (ks[1] + _THREEFRY_INJECTIONS[2])
 
     for r in rotations[1]:
       x = apply_round(x, r)
     x[0] = x[0] + ks[1]
-    x[1] = x[1] + ks[2] + np.uint32(4)
+    x[1] = x[1] + (ks[2] + _THREEFRY_INJECTIONS[3])
 
     for r in rotations[0]:
       x = apply_round(x, r)
     x[0] = x[0] + ks[2]
-    x[1] = x[1] + ks[0] + np.uint32(5)
+    x[1] = x[1] + (ks[0] + _THREEFRY_INJECTIONS[4])
 
   return tuple(x)
 
 
-def _threefry2x32_gpu_translation_rule(c, k1, k2, x1, x2):
+def _threefry2x32_custom_call_translation_rule(prng_lib, c, k1, k2, x1, x2):
+  # Lowers to the native kernel of `prng_lib` (jaxlib's cuda_prng or cpu_prng),
+  # which expects all four operands at the full broadcast shape.
   shape = lax.broadcast_shapes(
       c.get_shape(k1).dimensions(), c.get_shape(k2).dimensions(),
       c.get_shape(x1).dimensions(), c.get_shape(x2).dimensions())
@@ -356,7 +376,7 @@ def _threefry2x32_gpu_translation_rule(c, k1, k2, x1, x2):
     ndims = c.get_shape(x).rank()
     return xla_client.ops.BroadcastInDim(x, shape,
                                          tuple(range(rank - ndims, rank)))
-  return cuda_prng.threefry2x32(
+  return prng_lib.threefry2x32(
       c, (_broadcast(k1), _broadcast(k2)), (_broadcast(x1), _broadcast(x2)))
 
 
@@ -368,12 +388,18 @@ batching.defbroadcasting(threefry2x32_p)
 xla.translations_with_avals[threefry2x32_p] = xla.lower_fun(
     partial(_threefry2x32_lowering, use_rolled_loops=False),
     multiple_results=True, with_avals=True)
-xla.backend_specific_translations['cpu'][threefry2x32_p] = xla.lower_fun(
-    partial(_threefry2x32_lowering, use_rolled_loops=True),
-    multiple_results=True)
+if cpu_prng:
+  # The native kernel hashes eight counters at a time with AVX2 where the host
+  # supports it, which XLA's lowering of the rolled loop below does not.
+  xla.backend_specific_translations['cpu'][threefry2x32_p] = partial(
+      _threefry2x32_custom_call_translation_rule, cpu_prng)
+else:
+  xla.backend_specific_translations['cpu'][threefry2x32_p] = xla.lower_fun(
+      partial(_threefry2x32_lowering, use_rolled_loops=True),
+      multiple_results=True)
 if cuda_prng:
-  xla.backend_specific_translations['gpu'][threefry2x32_p] = \
-      _threefry2x32_gpu_translation_rule
+  xla.backend_specific_translations['gpu'][threefry2x32_p] = partial(
+      _threefry2x32_custom_call_translation_rule, cuda_prng)
 
 
 @partial(jit, inline=True)
@@ -400,16 +426,22 @@ def threefry_2x32(keypair, count):
     raise core.InconclusiveDimensionOperation(msg) from e
 
   if odd_size:
-    x = list(jnp.split(jnp.concatenate([count.ravel(), np.uint32([0])]), 2))
+    x = _threefry_2x32_halves(
+        key1, key2, jnp.concatenate([count.ravel(), np.uint32([0])]))
   else:
-    x = list(jnp.split(count.ravel(), 2))
-
-  x = threefry2x32_p.bind(key1, key2, x[0], x[1])
+    x = _threefry_2x32_halves(key1, key2, count.ravel())
   out = jnp.concatenate(x)
   assert out.dtype == np.uint32
   return lax.reshape(out[:-1] if odd_size else out, count.shape)
 
 
+def _threefry_2x32_halves(key1, key2, count):
+  # Hashes an even-sized flat `count` and returns the results for its first and
+  # second halves separately; threefry_2x32 concatenates them.
+  x = jnp.split(count, 2)
+  return threefry2x32_p.bind(key1, key2, x[0], x[1])
+
+
 def threefry_split(key: jnp.ndarray, num: int) -> jnp.ndarray:
   return _threefry_split(key, int(num))  # type: ignore
 
@@ -424,10 +456,14 @@ def threefry_fold_in(key: jnp.ndarray, data: int) -> jnp.ndarray:
 
 @partial(jit, inline=True)
 def _threefry_fold_in(key, data):
-  return threefry_2x32(key, threefry_seed(data))
+  # Equivalent to threefry_2x32(key, threefry_seed(data)), but hashes the two
+  # words of `data` directly instead of packing them into a count array that
+  # threefry_2x32 would immediately flatten and split apart again.
+  x1, x2 = _threefry_seed_halves(data)
+  k1, k2 = lax.slice(key, (0,), (1,)), lax.slice(key, (1,), (2,))
+  return lax.concatenate(threefry2x32_p.bind(k1, k2, x1, x2), 0)
 
 
-@partial(jit, static_argnums=(1, 2), inline=True)
 def threefry_random_bits(key: jnp.ndarray, bit_width, shape):
   """Sample uniform random bits of given width and shape using PRNG key."""
   if not _is_threefry_prng_key(key):
@@ -442,7 +478,19 @@ def threefry_random_bits(key: jnp.ndarray, bit_width, shape):
                        f"but it really is {real_size}")
     axis_index = lax.axis_index(name)
     key = threefry_fold_in(key, axis_index)
-  size = prod(shape.positional)
+  if config.jax_threefry_partitionable:
+    # Whether the bits come from RngBitGenerator depends on the platform the
+    # computation is placed on, so the choice is left to the translation rule.
+    return threefry_random_bits_p.bind(key, bit_width=bit_width,
+                                       shape=tuple(shape.positional))
+  # The bits only depend on the total number of elements, so the jitted core
+  # is keyed on that rather than on the shape: requests for different shapes
+  # of the same size share one compiled computation.
+  bits = _threefry_random_bits_flat(key, bit_width, prod(shape.positional))
+  return lax.reshape(bits, shape)
+
+@partial(jit, static_argnums=(1, 2), inline=True)
+def _threefry_random_bits_flat(key: jnp.ndarray, bit_width, size):
   # Compute ceil(bit_width * size / 32) in a way that is friendly to shape
   # polymorphism
   max_count, r = divmod(bit_width * size, 32)
@@ -454,7 +502,12 @@ def threefry_random_bits(key: jnp.ndarray, bit_width, shape):
   else:
     nblocks, rem = 0, max_count
 
-  if not nblocks:
+  if not nblocks and bit_width == 64:
+    # The high and low words are exactly the hashes of the first and second
+    # halves of the counts, so take them from the hash directly instead of
+    # concatenating its outputs only to split them apart again.
+    halves = _threefry_2x32_halves(key[0], key[1], lax.iota(np.uint32, rem))
+  elif not nblocks:
     bits = threefry_2x32(key, lax.iota(np.uint32, rem))
   else:
     keys = threefry_split(key, nblocks + 1)
@@ -465,7 +518,9 @@ def threefry_random_bits(key: jnp.ndarray, bit_width, shape):
 
   dtype = UINT_DTYPES[bit_width]
   if bit_width == 64:
-    bits = [lax.convert_element_type(x, dtype) for x in jnp.split(bits, 2)]
+    if nblocks:
+      halves = jnp.split(bits, 2)
+    bits = [lax.convert_element_type(x, dtype) for x in halves]
     bits = lax.shift_left(bits[0], dtype(32)) | bits[1]
   elif bit_width in [8, 16]:
     # this is essentially bits.view(dtype)[:size]
@@ -481,7 +536,54 @@ def threefry_random_bits(key: jnp.ndarray, bit_width, shape):
     )
     bits = lax.reshape(bits, (np.uint32(max_count * 32 // bit_width),), (1, 0))
     bits = lax.convert_element_type(bits, dtype)[:size]
-  return lax.reshape(bits, shape)
+  return bits
+
+
+def _threefry_random_bits_default(key, *, bit_width, shape):
+  # Leading axes of `key` are batch axes added by the batching rule.
+  def bits(key):
+    return lax.reshape(_threefry_random_bits_flat(key, bit_width, prod(shape)),
+                       shape)
+  for _ in range(key.ndim - 1):
+    bits = vmap(bits)
+  return bits(key)
+
+def _threefry_random_bits_rbg(key, *, bit_width, shape):
+  if key.ndim > 1:
+    # RngBitGenerator takes a single state, so a batch of keys could only be
+    # served by a loop of one op per key. The vectorized hash is used instead.
+    return _threefry_random_bits_default(key, bit_width=bit_width, shape=shape)
+  # RngBitGenerator takes a u32[4] state; like the RBG implementation below,
+  # build it by repeating the two-word threefry key.
+  _, bits = lax.rng_bit_generator(
+      jnp.concatenate([key, key]), shape, dtype=UINT_DTYPES[bit_width],
+      algorithm=lax.RandomAlgorithm.RNG_THREE_FRY)
+  return bits
+
+def _threefry_random_bits_abstract_eval(key, *, bit_width, shape):
+  return core.ShapedArray(key.shape[:-1] + shape, UINT_DTYPES[bit_width])
+
+def _threefry_random_bits_batching_rule(batched_args, batch_dims, *, bit_width,
+                                        shape):
+  key, = batched_args
+  bd, = batch_dims
+  key = batching.moveaxis(key, bd, 0)
+  return threefry_random_bits_p.bind(key, bit_width=bit_width, shape=shape), 0
+
+# Only used with jax_threefry_partitionable. On TPU the bits for a single key
+# come from XLA's RngBitGenerator; batched keys, and all keys on other
+# platforms, use the default implementation.
+threefry_random_bits_p = core.Primitive("threefry_random_bits")
+threefry_random_bits_p.def_impl(
+    partial(xla.apply_primitive, threefry_random_bits_p))
+threefry_random_bits_p.def_abstract_eval(_threefry_random_bits_abstract_eval)
+batching.primitive_batchers[threefry_random_bits_p] = (
+    _threefry_random_bits_batching_rule)
+xla.translations_with_avals[threefry_random_bits_p] = xla.lower_fun(
+    _threefry_random_bits_default, multiple_results=False, with_avals=True)
+xla.backend_specific_translations['tpu'][threefry_random_bits_p] = (
+    xla.lower_fun(_threefry_random_bits_rbg, multiple_results=False,
+                  backend='tpu'))
 
 
 threefry_prng_impl = PRNGImpl(
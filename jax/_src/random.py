@@ -196,25 +196,32 @@ def _uniform(key, shape, dtype, minval, maxval) -> jnp.ndarray:
   minval = lax.broadcast_to_rank(minval, shape.positional_rank)
   maxval = lax.broadcast_to_rank(maxval, shape.positional_rank)
 
-  finfo = jnp.finfo(dtype)
-  nbits, nmant = finfo.bits, finfo.nmant
+  nbits = jnp.finfo(dtype).bits
 
   if nbits not in (16, 32, 64):
-    raise TypeError("uniform only accepts 32- or 64-bit dtypes.")
+    raise TypeError("uniform only accepts 16-, 32- or 64-bit dtypes.")
 
   bits = _random_bits(key, nbits, shape)
+  floats = _uniform_from_bits(bits, dtype)
+  return lax.max(
+      minval,
+      lax.reshape(floats * (maxval - minval) + minval, shape.positional))
+
 
+def _uniform_from_bits(bits, dtype) -> jnp.ndarray:
+  # Maps unsigned random bits of the same width as `dtype` to floats in [0, 1).
+  # Half-precision dtypes (float16, bfloat16) draw 16-bit words directly, so
+  # they consume half the random bits of a float32 sample and need no cast.
   # The strategy here is to randomize only the mantissa bits with an exponent of
   # 1 (after applying the bias), then shift and scale to the desired range. The
   # bit-level transformation we use relies on Numpy and XLA having bit-for-bit
   # equivalent float representations, which might not be true on all platforms.
+  finfo = jnp.finfo(dtype)
+  nbits, nmant = finfo.bits, finfo.nmant
   float_bits = lax.bitwise_or(
       lax.shift_right_logical(bits, np.array(nbits - nmant, lax.dtype(bits))),
       np.array(1., dtype).view(UINT_DTYPES[nbits]))
-  floats = lax.bitcast_convert_type(float_bits, dtype) - np.array(1., dtype)
-  return lax.max(
-      minval,
-      lax.reshape(floats * (maxval - minval) + minval, shape.positional))
+  return lax.bitcast_convert_type(float_bits, dtype) - np.array(1., dtype)
 
 
 def randint(key: KeyArray,
@@ -490,6 +497,13 @@ def _normal_real(key, shape, dtype) -> jnp.ndarray:
   u = uniform(key, shape, dtype, lo, hi)  # type: ignore[arg-type]
   return np.array(np.sqrt(2), dtype) * lax.erf_inv(u)
 
+def _normal_from_bits(bits, dtype) -> jnp.ndarray:
+  # Same transformation as _normal_real, for samplers that draw their own bits.
+  lo = np.nextafter(np.array(-1., dtype), np.array(0., dtype), dtype=dtype)
+  hi = np.array(1., dtype)
+  u = lax.max(lo, _uniform_from_bits(bits, dtype) * (hi - lo) + lo)
+  return np.array(np.sqrt(2), dtype) * lax.erf_inv(u)
+
 
 def multivariate_normal(key: KeyArray,
                         mean: RealArray,
@@ -653,7 +667,18 @@ def _bernoulli(key, p, shape) -> jnp.ndarray:
   else:
     _check_shape("bernoulli", shape, np.shape(p))
 
-  return uniform(key, shape, lax.dtype(p)) < p
+  # `uniform(key, shape, dtype)` is m * 2**-nmant for the top nmant random bits
+  # m, so comparing m against ceil(p * 2**nmant) yields exactly the samples of
+  # `uniform(key, shape, dtype) < p` without converting any bits to floats.
+  dtype = lax.dtype(p)
+  finfo = jnp.finfo(dtype)
+  nbits, nmant = finfo.bits, finfo.nmant
+  bits = _random_bits(key, nbits, shape)
+  mantissa = lax.shift_right_logical(bits, np.array(nbits - nmant, bits.dtype))
+  threshold = lax.ceil(jnp.clip(p, 0, 1) * np.array(2 ** nmant, dtype))
+  # A NaN probability never compares greater than a uniform sample.
+  threshold = jnp.where(jnp.isnan(p), np.array(0, dtype), threshold)
+  return mantissa < lax.convert_element_type(threshold, bits.dtype)
 
 
 def beta(key: KeyArray,
@@ -696,11 +721,12 @@ def _beta(key, a, b, shape, dtype):
 
   a = lax.convert_element_type(a, dtype)
   b = lax.convert_element_type(b, dtype)
-  key_a, key_b = _split(key)
   a = jnp.broadcast_to(a, shape)
   b = jnp.broadcast_to(b, shape)
-  gamma_a = gamma(key_a, a, shape, dtype)
-  gamma_b = gamma(key_b, b, shape, dtype)
+  # Both gamma variates come from one call, so they share a single batched
+  # rejection loop instead of running two loops back to back.
+  gamma_ab = gamma(key, jnp.stack([a, b]), (2,) + tuple(shape), dtype)
+  gamma_a, gamma_b = gamma_ab[0], gamma_ab[1]
   return gamma_a / (gamma_a + gamma_b)
 
 
@@ -814,60 +840,68 @@ def _exponential(key, shape, dtype):
   return lax.neg(lax.log1p(lax.neg(u)))
 
 
-def _gamma_one(key: KeyArray, alpha):
+def _gamma_batched(key: KeyArray, alpha):
   # Ref: A simple method for generating gamma variables, George Marsaglia and Wai Wan Tsang
   # The algorithm can also be founded in:
   # https://en.wikipedia.org/wiki/Gamma_distribution#Generating_gamma-distributed_random_variables
-  zero = _constant_like(alpha, 0)
+  #
+  # All elements of `alpha` run the rejection loop in lockstep: every iteration
+  # draws one batch of candidates for the whole array, and lanes that have
+  # already accepted keep their value. This avoids a per-element while_loop,
+  # which under vmap runs every lane for as many iterations as the slowest one
+  # and calls the PRNG separately for each element.
+  shape = np.shape(alpha)
+  dtype = lax.dtype(alpha)
   one = _constant_like(alpha, 1)
-  minus_one = _constant_like(alpha, -1)
   one_over_two = _constant_like(alpha, 0.5)
   one_over_three = _constant_like(alpha, 1. / 3.)
   squeeze_const = _constant_like(alpha, 0.0331)
-  dtype = lax.dtype(alpha)
 
   key, subkey = _split(key)
   # for alpha < 1, we boost alpha to alpha + 1 and get a sample according to
   # Gamma(alpha) ~ Gamma(alpha+1) * Uniform()^(1 / alpha)
   boost = lax.select(lax.ge(alpha, one),
-                     one,
-                     lax.pow(uniform(subkey, (), dtype=dtype), lax.div(one, alpha)))
+                     lax.full_like(alpha, 1),
+                     lax.pow(uniform(subkey, shape, dtype=dtype), lax.div(one, alpha)))
   alpha = lax.select(lax.ge(alpha, one), alpha, lax.add(alpha, one))
 
   d = lax.sub(alpha, one_over_three)
   c = lax.div(one_over_three, lax.sqrt(d))
 
-  def _cond_fn(kXVU):
-    _, X, V, U = kXVU
-    # TODO: use lax.cond when its batching rule is supported
-    # The reason is to avoid evaluating second condition which involves log+log
-    # if the first condition is satisfied
-    cond = lax.bitwise_and(lax.ge(U, lax.sub(one, lax.mul(squeeze_const, lax.mul(X, X)))),
-                           lax.ge(lax.log(U), lax.add(lax.mul(X, one_over_two),
-                                                      lax.mul(d, lax.add(lax.sub(one, V),
-                                                                         lax.log(V))))))
-    return cond
-
-  def _body_fn(kXVU):
-    def _next_kxv(kxv):
-      key = kxv[0]
-      key, subkey = _split(key)
-      x = normal(subkey, (), dtype=dtype)
-      v = lax.add(one, lax.mul(x, c))
-      return key, x, v
-
-    key = kXVU[0]
-    key, x_key, U_key = _split(key, 3)
-    _, x, v = lax.while_loop(lambda kxv: lax.le(kxv[2], zero), _next_kxv, (x_key, zero, minus_one))
-    X = lax.mul(x, x)
-    V = lax.mul(lax.mul(v, v), v)
-    U = uniform(U_key, (), dtype=dtype)
-    return key, X, V, U
+  nbits = jnp.finfo(dtype).bits
 
-  # initial state is chosen such that _cond_fn will return True
-  _, _, V, _ = lax.while_loop(_cond_fn, _body_fn, (key, zero, one, _constant_like(alpha, 2)))
+  def _cond_fn(iVA):
+    return lax.bitwise_not(jnp.all(iVA[2]))
+
+  def _body_fn(iVA):
+    i, V, accepted = iVA
+    # A single PRNG call per iteration supplies the bits for both the normal
+    # candidate and the acceptance uniform.
+    bits = _random_bits(_fold_in(key, i), nbits, (2,) + shape)
+    x = _normal_from_bits(bits[0], dtype)
+    v = lax.add(one, lax.mul(x, c))
+    X = lax.mul(x, x)
+    V_new = lax.mul(lax.mul(v, v), v)
+    U = _uniform_from_bits(bits[1], dtype)
+    # Candidates with v <= 0 are always rejected; the log terms below are NaN
+    # for them, which compares False as well.
+    accept = lax.bitwise_and(
+        lax.gt(v, lax.full_like(v, 0)),
+        lax.bitwise_or(
+            lax.lt(U, lax.sub(one, lax.mul(squeeze_const, lax.mul(X, X)))),
+            lax.lt(lax.log(U), lax.add(lax.mul(X, one_over_two),
+                                       lax.mul(d, lax.add(lax.sub(one, V_new),
+                                                          lax.log(V_new)))))))
+    accept = lax.bitwise_and(accept, lax.bitwise_not(accepted))
+    V = lax.select(accept, V_new, V)
+    return i + 1, V, lax.bitwise_or(accepted, accept)
+
+  _, V, _ = lax.while_loop(
+      _cond_fn, _body_fn,
+      (0, lax.full_like(alpha, 1), lax.full_like(alpha, False, jnp.bool_)))
   z = lax.mul(lax.mul(d, V), boost)
-  return lax.select(lax.eq(z, zero), jnp.finfo(z.dtype).tiny, z)
+  return lax.select(lax.eq(z, lax.full_like(z, 0)),
+                    lax.full_like(z, jnp.finfo(z.dtype).tiny), z)
 
 
 def _gamma_grad(sample, a):
@@ -881,18 +915,15 @@ def _gamma_grad(sample, a):
 
 def _gamma_impl(key, a, use_vmap=False):
   a_shape = jnp.shape(a)
-  # split key to match the shape of a
+  # one batched rejection loop per key; leading dims of `a` match those of key
   key_ndim = jnp.ndim(key) - 1
-  split_impl = prng.threefry_prng_impl.split
-  key = jnp.reshape(key, (-1, 2))
-  key = vmap(split_impl, in_axes=(0, None))(key, prod(a_shape[key_ndim:]))
   keys = jnp.reshape(key, (-1, 2))
   keys = prng.PRNGKeyArray(prng.threefry_prng_impl, keys)
-  alphas = jnp.reshape(a, -1)
+  alphas = jnp.reshape(a, (prod(a_shape[:key_ndim]), prod(a_shape[key_ndim:])))
   if use_vmap:
-    samples = vmap(_gamma_one)(keys, alphas)
+    samples = vmap(_gamma_batched)(keys, alphas)
   else:
-    samples = lax.map(lambda args: _gamma_one(*args), (keys, alphas))
+    samples = lax.map(lambda args: _gamma_batched(*args), (keys, alphas))
 
   return jnp.reshape(samples, a_shape)
 
@@ -1293,7 +1324,7 @@ def _t(key, df, shape, dtype):
   n = normal(key_n, shape, dtype)
   two = _constant_like(n, 2)
   half_df = lax.div(df, two)
-  g = gamma(key_n, half_df, shape, dtype)
+  g = gamma(key_g, half_df, shape, dtype)
   return n * jnp.sqrt(half_df / g)
 
 
@@ -138,6 +138,7 @@ def minimize_bfgs(
     )
     s_k = line_search_results.a_k * p_k
     x_kp1 = state.x_k + s_k
+    # The line search already evaluated f and its gradient at x_kp1.
     f_kp1 = line_search_results.f_k
     g_kp1 = line_search_results.g_k
     y_k = g_kp1 - state.g_k
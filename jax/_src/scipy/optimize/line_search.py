@@ -18,6 +18,7 @@ from functools import partial
 import jax.numpy as jnp
 import jax
 from jax import lax
+from jax.tree_util import tree_map
 
 _dot = partial(jnp.dot, precision=lax.Precision.HIGHEST)
 
@@ -27,12 +28,18 @@ def _cubicmin(a, fa, fpa, b, fb, c, fc):
   db = b - a
   dc = c - a
   denom = (db * dc) ** 2 * (db - dc)
-  d1 = jnp.array([[dc ** 2, -db ** 2],
-                  [-dc ** 3, db ** 3]])
-  A, B = _dot(d1, jnp.array([fb - fa - C * db, fc - fa - C * dc])) / denom
+  rb = fb - fa - C * db
+  rc = fc - fa - C * dc
+  A = (dc ** 2 * rb - db ** 2 * rc) / denom
+  B = (-dc ** 3 * rb + db ** 3 * rc) / denom
 
+  # A negative radical means the cubic has no minimizer; return inf, which the
+  # caller's bounds check rejects, rather than taking the sqrt of it.
   radical = B * B - 3. * A * C
-  xmin = a + (-B + jnp.sqrt(radical)) / (3. * A)
+  has_min = radical >= 0
+  safe_radical = jnp.where(has_min, radical, 0.)
+  xmin = jnp.where(has_min, a + (-B + jnp.sqrt(safe_radical)) / (3. * A),
+                   jnp.inf)
 
   return xmin
 
@@ -46,13 +53,18 @@ def _quadmin(a, fa, fpa, b, fb):
   return xmin
 
 
-def _binary_replace(replace_bit, original_dict, new_dict, keys=None):
-  if keys is None:
-    keys = new_dict.keys()
-  out = dict()
-  for key in keys:
-    out[key] = jnp.where(replace_bit, new_dict[key], original_dict[key])
-  return out
+def _binary_replace(replace_bit, state, updates):
+  """Replaces the fields of `state` named in `updates` where `replace_bit`.
+
+  Each field keeps its dtype, so that an update computed in a wider precision
+  does not change the type of a loop carry. Fields may be pytrees.
+  """
+  def replace(old, new):
+    return lax.convert_element_type(jnp.where(replace_bit, new, old),
+                                    jnp.result_type(old))
+  return state._replace(**{
+      key: tree_map(replace, getattr(state, key), value)
+      for key, value in updates.items()})
 
 
 class _ZoomState(NamedTuple):
@@ -70,9 +82,39 @@ class _ZoomState(NamedTuple):
   a_star: Union[float, jnp.ndarray]
   phi_star: Union[float, jnp.ndarray]
   dphi_star: Union[float, jnp.ndarray]
-  g_star: Union[float, jnp.ndarray]
-  nfev: Union[int, jnp.ndarray]
-  ngev: Union[int, jnp.ndarray]
+  g_star: Union[None, jnp.ndarray]
+
+
+_ZOOM_STEP_FIELDS = ('a_lo', 'a_hi', 'a_rec', 'a_star')
+_ZOOM_VALUE_FIELDS = ('phi_lo', 'dphi_lo', 'phi_hi', 'dphi_hi', 'phi_rec',
+                      'phi_star', 'dphi_star')
+
+
+def _pack_zoom_state(state, step_dtype, value_dtype):
+  """Packs the floating-point scalar fields of a `_ZoomState` into arrays.
+
+  `lax.while_loop` threads every leaf of its carry as a separate buffer, so
+  packing the scalars keeps the zoom carry down to a handful of buffers. Step
+  sizes and function values are packed separately so that each keeps its own
+  precision. The gradient `g_star` is carried as is.
+  """
+  steps = jnp.stack([jnp.asarray(getattr(state, key), step_dtype)
+                     for key in _ZOOM_STEP_FIELDS])
+  values = jnp.stack([jnp.asarray(getattr(state, key), value_dtype)
+                      for key in _ZOOM_VALUE_FIELDS])
+  return steps, values, state.j, state.done, state.failed, state.g_star
+
+
+def _unpack_zoom_state(packed):
+  steps, values, j, done, failed, g_star = packed
+  return _ZoomState(
+      done=done,
+      failed=failed,
+      j=j,
+      g_star=g_star,
+      **{key: steps[i] for i, key in enumerate(_ZOOM_STEP_FIELDS)},
+      **{key: values[i] for i, key in enumerate(_ZOOM_VALUE_FIELDS)},
+  )
 
 
 def _zoom(restricted_func_and_grad, wolfe_one, wolfe_two, a_lo, phi_lo,
@@ -81,6 +123,10 @@ def _zoom(restricted_func_and_grad, wolfe_one, wolfe_two, a_lo, phi_lo,
   Implementation of zoom. Algorithm 3.6 from Wright and Nocedal, 'Numerical
   Optimization', 1999, pg. 59-61. Tries cubic, quadratic, and bisection methods
   of zooming.
+
+  `restricted_func_and_grad` returns None in place of the gradient when the
+  line search evaluates directional derivatives with `jvp`, in which case
+  `g_0` is None as well and no gradient is carried.
   """
   state = _ZoomState(
       done=False,
@@ -94,12 +140,10 @@ def _zoom(restricted_func_and_grad, wolfe_one, wolfe_two, a_lo, phi_lo,
       dphi_hi=dphi_hi,
       a_rec=(a_lo + a_hi) / 2.,
       phi_rec=(phi_lo + phi_hi) / 2.,
-      a_star=1.,
+      a_star=jnp.ones_like(a_lo),
       phi_star=phi_lo,
       dphi_star=dphi_lo,
       g_star=g_0,
-      nfev=0,
-      ngev=0,
   )
   delta1 = 0.2
   delta2 = 0.1
@@ -108,103 +152,134 @@ def _zoom(restricted_func_and_grad, wolfe_one, wolfe_two, a_lo, phi_lo,
     # Body of zoom algorithm. We use boolean arithmetic to avoid using jax.cond
     # so that it works on GPU/TPU.
     dalpha = (state.a_hi - state.a_lo)
-    a = jnp.minimum(state.a_hi, state.a_lo)
-    b = jnp.maximum(state.a_hi, state.a_lo)
+    swap = state.a_hi < state.a_lo
+    a = jnp.where(swap, state.a_hi, state.a_lo)
+    b = jnp.where(swap, state.a_lo, state.a_hi)
     cchk = delta1 * dalpha
     qchk = delta2 * dalpha
 
     # This will cause the line search to stop, and since the Wolfe conditions
     # are not satisfied the minimization should stop too.
     threshold = jnp.where((jnp.finfo(dalpha).bits < 64), 1e-5, 1e-10)
-    state = state._replace(failed=state.failed | (dalpha <= threshold))
-
-    # Cubmin is sometimes nan, though in this case the bounds check will fail.
-    a_j_cubic = _cubicmin(state.a_lo, state.phi_lo, state.dphi_lo, state.a_hi,
-                          state.phi_hi, state.a_rec, state.phi_rec)
+    failed = state.failed | (dalpha <= threshold)
+
+    # Cubmin is sometimes inf or nan, though in this case the bounds check will
+    # fail.
+    # There is no recorded third point before the first iteration, so the
+    # cubic step is skipped there.
+    a_j_cubic = lax.cond(
+        state.j > 0,
+        lambda _: _cubicmin(state.a_lo, state.phi_lo, state.dphi_lo,
+                            state.a_hi, state.phi_hi, state.a_rec,
+                            state.phi_rec),
+        lambda _: jnp.full_like(state.a_rec, jnp.nan),
+        None)
     use_cubic = (state.j > 0) & (a_j_cubic > a + cchk) & (a_j_cubic < b - cchk)
     a_j_quad = _quadmin(state.a_lo, state.phi_lo, state.dphi_lo, state.a_hi, state.phi_hi)
     use_quad = (~use_cubic) & (a_j_quad > a + qchk) & (a_j_quad < b - qchk)
     a_j_bisection = (state.a_lo + state.a_hi) / 2.
     use_bisection = (~use_cubic) & (~use_quad)
 
-    a_j = jnp.where(use_cubic, a_j_cubic, state.a_rec)
-    a_j = jnp.where(use_quad, a_j_quad, a_j)
-    a_j = jnp.where(use_bisection, a_j_bisection, a_j)
+    a_j = jnp.select([use_cubic, use_quad, use_bisection],
+                     [a_j_cubic, a_j_quad, a_j_bisection],
+                     default=state.a_rec)
 
     phi_j, dphi_j, g_j = restricted_func_and_grad(a_j)
-    state = state._replace(nfev=state.nfev + 1,
-                           ngev=state.ngev + 1)
 
     hi_to_j = wolfe_one(a_j, phi_j) | (phi_j >= state.phi_lo)
     star_to_j = wolfe_two(dphi_j) & (~hi_to_j)
     hi_to_lo = (dphi_j * (state.a_hi - state.a_lo) >= 0.) & (~hi_to_j) & (~star_to_j)
     lo_to_j = (~hi_to_j) & (~star_to_j)
 
+    # The four cases are resolved field by field so the carry is updated in a
+    # single replace. hi_to_lo implies lo_to_j, in which case the old lo point
+    # moves to hi, a_j becomes the new lo point and the old lo is recorded.
+    # The gradient, if carried, follows a_star.
+    j = state.j + 1
     state = state._replace(
-        **_binary_replace(
-            hi_to_j,
-            state._asdict(),
-            dict(
-                a_hi=a_j,
-                phi_hi=phi_j,
-                dphi_hi=dphi_j,
-                a_rec=state.a_hi,
-                phi_rec=state.phi_hi,
-            ),
-        ),
-    )
-
-    # for termination
-    state = state._replace(
+        # for termination
         done=star_to_j | state.done,
-        **_binary_replace(
-            star_to_j,
-            state._asdict(),
-            dict(
-                a_star=a_j,
-                phi_star=phi_j,
-                dphi_star=dphi_j,
-                g_star=g_j,
-            )
-        ),
-    )
-    state = state._replace(
-        **_binary_replace(
-            hi_to_lo,
-            state._asdict(),
-            dict(
-                a_hi=state.a_lo,
-                phi_hi=state.phi_lo,
-                dphi_hi=state.dphi_lo,
-                a_rec=state.a_hi,
-                phi_rec=state.phi_hi,
-            ),
-        ),
+        # Choose higher cutoff for maxiter than Scipy as Jax takes longer to
+        # find the same value - possibly floating point issues?
+        failed=failed | j >= 30,
+        j=j,
+        a_lo=jnp.where(lo_to_j, a_j, state.a_lo),
+        phi_lo=jnp.where(lo_to_j, phi_j, state.phi_lo),
+        dphi_lo=jnp.where(lo_to_j, dphi_j, state.dphi_lo),
+        a_hi=jnp.where(hi_to_j, a_j,
+                       jnp.where(hi_to_lo, state.a_lo, state.a_hi)),
+        phi_hi=jnp.where(hi_to_j, phi_j,
+                         jnp.where(hi_to_lo, state.phi_lo, state.phi_hi)),
+        dphi_hi=jnp.where(hi_to_j, dphi_j,
+                          jnp.where(hi_to_lo, state.dphi_lo, state.dphi_hi)),
+        a_rec=jnp.where(hi_to_j, state.a_hi,
+                        jnp.where(lo_to_j, state.a_lo, state.a_rec)),
+        phi_rec=jnp.where(hi_to_j, state.phi_hi,
+                          jnp.where(lo_to_j, state.phi_lo, state.phi_rec)),
+        a_star=jnp.where(star_to_j, a_j, state.a_star),
+        phi_star=jnp.where(star_to_j, phi_j, state.phi_star),
+        dphi_star=jnp.where(star_to_j, dphi_j, state.dphi_star),
     )
-    state = state._replace(
-        **_binary_replace(
-            lo_to_j,
-            state._asdict(),
-            dict(
-                a_lo=a_j,
-                phi_lo=phi_j,
-                dphi_lo=dphi_j,
-                a_rec=state.a_lo,
-                phi_rec=state.phi_lo,
-            ),
-        ),
-    )
-    state = state._replace(j=state.j + 1)
-    # Choose higher cutoff for maxiter than Scipy as Jax takes longer to find
-    # the same value - possibly floating point issues?
-    state = state._replace(failed= state.failed | state.j >= 30)
-    return state
+    return _binary_replace(star_to_j, state, dict(g_star=g_j))
 
-  state = lax.while_loop(lambda state: (~state.done) & (~pass_through) & (~state.failed),
-                         body,
-                         state)
+  step_dtype = jnp.result_type(*(getattr(state, key)
+                                 for key in _ZOOM_STEP_FIELDS))
+  value_dtype = jnp.result_type(*(getattr(state, key)
+                                  for key in _ZOOM_VALUE_FIELDS))
+  pack = partial(_pack_zoom_state, step_dtype=step_dtype,
+                 value_dtype=value_dtype)
+  packed = lax.while_loop(
+      lambda packed: (~packed[3]) & (~pass_through) & (~packed[4]),
+      lambda packed: pack(body(_unpack_zoom_state(packed))),
+      pack(state))
 
-  return state
+  return _unpack_zoom_state(packed)
+
+
+def _parallel_zoom(restricted_func_and_grad_batched, wolfe_one, wolfe_two,
+                   a_lo, phi_lo, dphi_lo, a_hi, g_0, pass_through,
+                   num_candidates=16):
+  """
+  Parallel alternative to `_zoom`. Instead of iteratively shrinking the
+  bracketing interval, evaluates `num_candidates` evenly spaced step sizes
+  strictly between `a_lo` and `a_hi` with a single call to the `vmap`-ed
+  function and picks the largest one satisfying the strong Wolfe conditions.
+  The number of function evaluations is fixed, which avoids divergent
+  iteration counts under `vmap`.
+  """
+  fractions = jnp.linspace(0., 1., num_candidates + 2,
+                           dtype=jnp.result_type(a_lo))[1:-1]
+  alphas = a_lo + (a_hi - a_lo) * fractions
+  # Most bracketing iterations do not zoom, so only evaluate the candidates
+  # when the result is used; on pass-through the outputs are discarded.
+  out_shapes = jax.eval_shape(restricted_func_and_grad_batched, alphas)
+  phis, dphis, gs = lax.cond(
+      pass_through,
+      lambda _: tree_map(lambda s: jnp.zeros(s.shape, s.dtype), out_shapes),
+      restricted_func_and_grad_batched,
+      alphas)
+
+  ok = (~wolfe_one(alphas, phis)) & wolfe_two(dphis)
+  idx = jnp.argmax(jnp.where(ok, alphas, -jnp.inf))
+  found = jnp.any(ok)
+
+  return _ZoomState(
+      done=found,
+      failed=~found,
+      j=jnp.where(pass_through, 0, num_candidates),
+      a_lo=a_lo,
+      phi_lo=phi_lo,
+      dphi_lo=dphi_lo,
+      a_hi=a_hi,
+      phi_hi=phis[-1],
+      dphi_hi=dphis[-1],
+      a_rec=alphas[idx],
+      phi_rec=phis[idx],
+      a_star=jnp.where(found, alphas[idx], 1.),
+      phi_star=jnp.where(found, phis[idx], phi_lo),
+      dphi_star=jnp.where(found, dphis[idx], dphi_lo),
+      g_star=tree_map(lambda g, g_0: jnp.where(found, g[idx], g_0), gs, g_0),
+  )
 
 
 class _LineSearchState(NamedTuple):
@@ -219,7 +294,7 @@ class _LineSearchState(NamedTuple):
   a_star: Union[float, jnp.ndarray]
   phi_star: Union[float, jnp.ndarray]
   dphi_star: Union[float, jnp.ndarray]
-  g_star: jnp.ndarray
+  g_star: Union[None, jnp.ndarray]
 
 
 class _LineSearchResults(NamedTuple):
@@ -233,7 +308,10 @@ class _LineSearchResults(NamedTuple):
     k: integer number of iterations
     a_k: integer step size
     f_k: final function value
-    g_k: final gradient value
+    g_k: final gradient value, i.e. the gradient of `f` at `xk + a_k * pk`.
+      Callers should reuse it rather than re-evaluating the gradient. With
+      `use_jvp=True` it is only evaluated if the search succeeded; otherwise
+      it is the gradient at `xk`.
     status: integer end status
   """
   failed: Union[bool, jnp.ndarray]
@@ -248,7 +326,8 @@ class _LineSearchResults(NamedTuple):
 
 
 def line_search(f, xk, pk, old_fval=None, old_old_fval=None, gfk=None, c1=1e-4,
-                c2=0.9, maxiter=20):
+                c2=0.9, maxiter=20, parallel_zoom=False,
+                fixed_iterations=False, use_jvp=False):
   """Inexact line search that satisfies strong Wolfe conditions.
 
   Algorithm 3.5 from Wright and Nocedal, 'Numerical Optimization', 1999, pg. 59-61
@@ -262,31 +341,61 @@ def line_search(f, xk, pk, old_fval=None, old_old_fval=None, gfk=None, c1=1e-4,
     old_old_fval: unused argument, only for scipy API compliance.
     maxiter: maximum number of iterations to search
     c1, c2: Wolfe criteria constant, see ref.
+    parallel_zoom: if True, replace the sequential zoom phase with a single
+      vectorized evaluation of a fixed set of candidate step sizes. This is
+      faster on accelerators and under `vmap`, but the accepted step is not
+      the one Scipy would choose.
+    fixed_iterations: if True, run the bracketing loop for exactly `maxiter`
+      iterations, masking out updates once the search has terminated. Useful
+      under `vmap`, where the loop runs to the batch-wide maximum anyway.
+    use_jvp: if True, evaluate the directional derivatives needed by the Wolfe
+      conditions with forward-mode `jvp` and take the full gradient only once,
+      at the accepted step. This is cheaper per step, but `fun` must then
+      support both `jvp` and `vjp`, which excludes e.g. `jax.custom_vjp`
+      functions.
 
   Returns: LineSearchResults
   """
+  # Keep the step sizes in the (real) precision of the search so the loop
+  # carries do not mix precisions.
+  dtype = jnp.result_type(jnp.real(xk), jnp.real(pk), float)
+
   def restricted_func_and_grad(t):
-    phi, g = jax.value_and_grad(f)(xk + t * pk)
+    x = xk + t * pk
+    if use_jvp:
+      phi, dphi = jax.jvp(f, (x,), (jnp.asarray(pk, x.dtype),))
+      return phi, jnp.real(dphi), None
+    phi, g = jax.value_and_grad(f)(x)
     dphi = jnp.real(_dot(g, pk))
     return phi, dphi, g
 
-  if old_fval is None or gfk is None:
-    phi_0, dphi_0, gfk = restricted_func_and_grad(0.)
+  restricted_func_and_grad_batched = jax.vmap(restricted_func_and_grad)
+
+  evaluate_start = old_fval is None or gfk is None
+  if evaluate_start:
+    # The gradient at the start is what a failed search returns.
+    phi_0, gfk = jax.value_and_grad(f)(xk)
+    dphi_0 = jnp.real(_dot(gfk, pk))
   else:
     phi_0 = old_fval
     dphi_0 = jnp.real(_dot(gfk, pk))
   if old_old_fval is not None:
     candidate_start_value = 1.01 * 2 * (phi_0 - old_old_fval) / dphi_0
     start_value = jnp.where(candidate_start_value > 1, 1.0, candidate_start_value)
+    start_value = jnp.asarray(start_value, dtype)
   else:
-    start_value = 1
+    start_value = jnp.ones((), dtype)
+
+  # Both Wolfe conditions scale dphi_0 by a constant; compute that once.
+  c1_dphi_0 = c1 * dphi_0
+  neg_c2_dphi_0 = -c2 * dphi_0
 
   def wolfe_one(a_i, phi_i):
     # actually negation of W1
-    return phi_i > phi_0 + c1 * a_i * dphi_0
+    return phi_i > phi_0 + a_i * c1_dphi_0
 
   def wolfe_two(dphi_i):
-    return jnp.abs(dphi_i) <= -c2 * dphi_0
+    return jnp.abs(dphi_i) <= neg_c2_dphi_0
 
   state = _LineSearchState(
       done=False,
@@ -294,15 +403,15 @@ def line_search(f, xk, pk, old_fval=None, old_old_fval=None, gfk=None, c1=1e-4,
       # algorithm begins at 1 as per Wright and Nocedal, however Scipy has a
       # bug and starts at 0. See https://github.com/scipy/scipy/issues/12157
       i=1,
-      a_i1=0.,
+      a_i1=jnp.zeros((), dtype),
       phi_i1=phi_0,
       dphi_i1=dphi_0,
-      nfev=1 if (old_fval is None or gfk is None) else 0,
-      ngev=1 if (old_fval is None or gfk is None) else 0,
-      a_star=0.,
+      nfev=1 if evaluate_start else 0,
+      ngev=1 if evaluate_start else 0,
+      a_star=jnp.zeros((), dtype),
       phi_star=phi_0,
       dphi_star=dphi_0,
-      g_star=gfk,
+      g_star=None if use_jvp else gfk,
   )
 
   def body(state):
@@ -311,82 +420,100 @@ def line_search(f, xk, pk, old_fval=None, old_old_fval=None, gfk=None, c1=1e-4,
     a_i = jnp.where(state.i == 1, start_value, state.a_i1 * 2.)
 
     phi_i, dphi_i, g_i = restricted_func_and_grad(a_i)
-    state = state._replace(nfev=state.nfev + 1,
-                           ngev=state.ngev + 1)
 
     star_to_zoom1 = wolfe_one(a_i, phi_i) | ((phi_i >= state.phi_i1) & (state.i > 1))
     star_to_i = wolfe_two(dphi_i) & (~star_to_zoom1)
     star_to_zoom2 = (dphi_i >= 0.) & (~star_to_zoom1) & (~star_to_i)
 
-    zoom1 = _zoom(restricted_func_and_grad,
-                  wolfe_one,
-                  wolfe_two,
-                  state.a_i1,
-                  state.phi_i1,
-                  state.dphi_i1,
-                  a_i,
-                  phi_i,
-                  dphi_i,
-                  gfk,
-                  ~star_to_zoom1)
-
-    state = state._replace(nfev=state.nfev + zoom1.nfev,
-                           ngev=state.ngev + zoom1.ngev)
-
-    zoom2 = _zoom(restricted_func_and_grad,
-                  wolfe_one,
-                  wolfe_two,
-                  a_i,
-                  phi_i,
-                  dphi_i,
-                  state.a_i1,
-                  state.phi_i1,
-                  state.dphi_i1,
-                  gfk,
-                  ~star_to_zoom2)
-
-    state = state._replace(nfev=state.nfev + zoom2.nfev,
-                           ngev=state.ngev + zoom2.ngev)
-
-    state = state._replace(
-        done=star_to_zoom1 | state.done,
-        failed=(star_to_zoom1 & zoom1.failed) | state.failed,
-        **_binary_replace(
-            star_to_zoom1,
-            state._asdict(),
-            zoom1._asdict(),
-            keys=['a_star', 'phi_star', 'dphi_star', 'g_star'],
+    # At most one of the two zoom cases applies, so select the bracket
+    # ordering and trace a single zoom instead of one per case.
+    do_zoom = star_to_zoom1 | star_to_zoom2
+    a_lo = jnp.where(star_to_zoom1, state.a_i1, a_i)
+    phi_lo = jnp.where(star_to_zoom1, state.phi_i1, phi_i)
+    dphi_lo = jnp.where(star_to_zoom1, state.dphi_i1, dphi_i)
+    a_hi = jnp.where(star_to_zoom1, a_i, state.a_i1)
+    phi_hi = jnp.where(star_to_zoom1, phi_i, state.phi_i1)
+    dphi_hi = jnp.where(star_to_zoom1, dphi_i, state.dphi_i1)
+
+    g_0 = None if use_jvp else gfk
+    if parallel_zoom:
+      zoom = _parallel_zoom(restricted_func_and_grad_batched,
+                            wolfe_one,
+                            wolfe_two,
+                            a_lo,
+                            phi_lo,
+                            dphi_lo,
+                            a_hi,
+                            g_0,
+                            ~do_zoom)
+    else:
+      zoom = _zoom(restricted_func_and_grad,
+                   wolfe_one,
+                   wolfe_two,
+                   a_lo,
+                   phi_lo,
+                   dphi_lo,
+                   a_hi,
+                   phi_hi,
+                   dphi_hi,
+                   g_0,
+                   ~do_zoom)
+
+    # Every zoom iteration does exactly one function evaluation, so the
+    # zoom's iteration count doubles as its evaluation count. Without jvp each
+    # evaluation also takes the gradient.
+    nfev = 1 + zoom.j
+    state = state._replace(nfev=state.nfev + nfev,
+                           ngev=state.ngev + (0 if use_jvp else nfev))
+
+    state = _binary_replace(
+        do_zoom,
+        state._replace(
+            done=do_zoom | state.done,
+            failed=(do_zoom & zoom.failed) | state.failed,
         ),
-    )
-    state = state._replace(
-        done=star_to_i | state.done,
-        **_binary_replace(
-            star_to_i,
-            state._asdict(),
-            dict(
-                a_star=a_i,
-                phi_star=phi_i,
-                dphi_star=dphi_i,
-                g_star=g_i,
-            ),
+        dict(
+            a_star=zoom.a_star,
+            phi_star=zoom.phi_star,
+            dphi_star=zoom.dphi_star,
+            g_star=zoom.g_star,
         ),
     )
-    state = state._replace(
-        done=star_to_zoom2 | state.done,
-        failed=(star_to_zoom2 & zoom2.failed) | state.failed,
-        **_binary_replace(
-            star_to_zoom2,
-            state._asdict(),
-            zoom2._asdict(),
-            keys=['a_star', 'phi_star', 'dphi_star', 'g_star'],
+    state = _binary_replace(
+        star_to_i,
+        state._replace(done=star_to_i | state.done),
+        dict(
+            a_star=a_i,
+            phi_star=phi_i,
+            dphi_star=dphi_i,
+            g_star=g_i,
         ),
     )
     state = state._replace(i=state.i + 1, a_i1=a_i, phi_i1=phi_i, dphi_i1=dphi_i)
     return state
 
-  state = lax.while_loop(lambda state: (~state.done) & (state.i <= maxiter) & (~state.failed),
-                         body,
-                         state)
+  def cond(state):
+    return (~state.done) & (state.i <= maxiter) & (~state.failed)
+
+  if fixed_iterations:
+    def fixed_body(_, state):
+      return tree_map(partial(jnp.where, cond(state)), body(state), state)
+    state = lax.fori_loop(0, maxiter, fixed_body, state)
+  else:
+    state = lax.while_loop(cond, body, state)
+
+  failed = state.failed | (~state.done)
+  if use_jvp:
+    # Only directional derivatives were taken while searching, so take the
+    # full gradient once, at the accepted step. A failed search is not
+    # continued from, so it skips the evaluation.
+    g_star = lax.cond(failed,
+                      lambda _: gfk,
+                      lambda a: lax.convert_element_type(
+                          jax.grad(f)(xk + a * pk), jnp.result_type(gfk)),
+                      state.a_star)
+    state = state._replace(ngev=state.ngev + jnp.where(failed, 0, 1),
+                           g_star=g_star)
 
   status = jnp.where(
       state.failed,
@@ -405,7 +532,7 @@ def line_search(f, xk, pk, old_fval=None, old_old_fval=None, gfk=None, c1=1e-4,
                       jnp.sign(alpha_k) * 1e-8,
                       alpha_k)
   results = _LineSearchResults(
-      failed=state.failed | (~state.done),
+      failed=failed,
       nit=state.i - 1,  # because iterations started at 1
       nfev=state.nfev,
       ngev=state.ngev,
@@ -416,3 +543,31 @@ def line_search(f, xk, pk, old_fval=None, old_old_fval=None, gfk=None, c1=1e-4,
       status=status,
   )
   return results
+
+
+def line_search_batched(f, xk, pk, old_fval=None, gfk=None, c1=1e-4, c2=0.9,
+                        maxiter=20, use_jvp=False):
+  """Strong Wolfe line search over a batch of points and search directions.
+
+  Equivalent to mapping `line_search` over the leading axis of `xk`, `pk`,
+  `old_fval` and `gfk`, but uses the parallel zoom and a fixed number of
+  bracketing iterations, so that every batch element does the same work and
+  no nested loops have to be run to the slowest element's iteration count.
+
+  Args:
+    f: function of the form f(x) where x is a flat ndarray and returns a real
+      scalar.
+    xk: batch of points, with shape (batch, n).
+    pk: batch of descent directions, with the same shape as `xk`.
+    old_fval, gfk: optional batch of values and gradients of `f` at `xk`.
+    c1, c2: Wolfe criteria constant, see ref.
+    maxiter: maximum number of iterations to search.
+    use_jvp: see `line_search`.
+
+  Returns: LineSearchResults with a leading batch axis.
+  """
+  def search(xk, pk, old_fval, gfk):
+    return line_search(f, xk, pk, old_fval=old_fval, gfk=gfk, c1=c1, c2=c2,
+                       maxiter=maxiter, parallel_zoom=True,
+                       fixed_iterations=True, use_jvp=use_jvp)
+  return jax.vmap(search)(xk, pk, old_fval, gfk)
@@ -546,7 +546,9 @@ def format_shape_dtype_string(shape, dtype):
     shape = tuple(shape)
   return _format_shape_dtype_string(shape, dtype)
 
-@functools.lru_cache(maxsize=64)
+# Unbounded: test generators sweep many more (shape, dtype) pairs than a small
+# LRU cache can hold, which would evict entries before they are reused.
+@functools.lru_cache(maxsize=None)
 def _format_shape_dtype_string(shape, dtype):
   if shape is NUMPY_SCALAR_SHAPE:
     return dtype_str(dtype)
@@ -894,10 +896,9 @@ class JaxTestCase(parameterized.TestCase):
       self._original_config[key] = getattr(config, key)
       config.update(key, value)
 
-    # We use the adler32 hash for two reasons.
-    # a) it is deterministic run to run, unlike hash() which is randomized.
-    # b) it returns values in int32 range, which RandomState requires.
-    self._rng = npr.RandomState(zlib.adler32(self._testMethodName.encode()))
+    # The per-test RandomState is created on first use by rng(), so tests that
+    # never draw random inputs don't pay for seeding a Mersenne Twister.
+    self._rng = None
 
   def tearDown(self):
     for key, value in self._original_config.items():
@@ -905,6 +906,11 @@ class JaxTestCase(parameterized.TestCase):
     super().tearDown()
 
   def rng(self):
+    if self._rng is None:
+      # We use the adler32 hash for two reasons.
+      # a) it is deterministic run to run, unlike hash() which is randomized.
+      # b) it returns values in int32 range, which RandomState requires.
+      self._rng = npr.RandomState(zlib.adler32(self._testMethodName.encode()))
     return self._rng
 
   def assertArraysEqual(self, x, y, *, check_dtypes=True, err_msg=''):
@@ -16,6 +16,7 @@ limitations under the License.
 // This file is not used by JAX itself, but exists to assist with running
 // JAX-generated HLO code from outside of JAX.
 
+#include "jaxlib/cpu_prng_kernels.h"
 #include "jaxlib/lapack_kernels.h"
 #include "jaxlib/pocketfft_kernels.h"
 #include "tensorflow/compiler/xla/service/custom_call_target_registry.h"
@@ -106,6 +107,8 @@ XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
 XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
     "lapack_zgees", ComplexGees<std::complex<double>>::Kernel, "Host");
 XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM("pocketfft", PocketFft, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM("cpu_threefry2x32", CpuThreeFry2x32,
+                                         "Host");
 
 }  // namespace
 }  // namespace jax
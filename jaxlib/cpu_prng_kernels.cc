@@ -0,0 +1,134 @@
+/* Copyright 2021 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+==============================================================================*/
+
+#include "jaxlib/cpu_prng_kernels.h"
+
+#include <cstdint>
+
+// The AVX2 kernel is compiled with a function-level target attribute and
+// selected at runtime, so jaxlib itself does not require AVX2.
+#if defined(__x86_64__) && (defined(__GNUC__) || defined(__clang__))
+#include <immintrin.h>
+#define JAX_CPU_PRNG_AVX2 1
+#endif
+
+namespace jax {
+namespace {
+
+// Rotation distances specified by the Threefry2x32 algorithm.
+constexpr std::uint32_t kRotations[8] = {13, 15, 26, 6, 17, 29, 16, 24};
+// 0x1BD11BDA is a parity constant specified by the ThreeFry2x32 algorithm.
+constexpr std::uint32_t kParity = 0x1BD11BDA;
+
+inline std::uint32_t RotateLeft(std::uint32_t v, std::uint32_t distance) {
+  return (v << distance) | (v >> (32 - distance));
+}
+
+// Hashes elements [begin, n) one at a time.
+void ThreeFry2x32Scalar(const std::uint32_t* key0, const std::uint32_t* key1,
+                        const std::uint32_t* data0, const std::uint32_t* data1,
+                        std::uint32_t* out0, std::uint32_t* out1,
+                        std::int64_t begin, std::int64_t n) {
+  for (std::int64_t idx = begin; idx < n; ++idx) {
+    std::uint32_t ks[3] = {key0[idx], key1[idx],
+                           kParity ^ key0[idx] ^ key1[idx]};
+    std::uint32_t x[2] = {data0[idx] + ks[0], data1[idx] + ks[1]};
+    // Five groups of four rounds, each followed by a key injection.
+    for (int group = 0; group < 5; ++group) {
+      for (int i = 0; i < 4; ++i) {
+        x[0] += x[1];
+        x[1] = RotateLeft(x[1], kRotations[(group % 2) * 4 + i]);
+        x[1] ^= x[0];
+      }
+      x[0] += ks[(group + 1) % 3];
+      x[1] += ks[(group + 2) % 3] + static_cast<std::uint32_t>(group + 1);
+    }
+    out0[idx] = x[0];
+    out1[idx] = x[1];
+  }
+}
+
+#ifdef JAX_CPU_PRNG_AVX2
+
+__attribute__((target("avx2"))) inline __m256i RotateLeftAvx2(
+    __m256i v, std::uint32_t distance) {
+  return _mm256_or_si256(
+      _mm256_sll_epi32(v, _mm_cvtsi32_si128(static_cast<int>(distance))),
+      _mm256_srl_epi32(v, _mm_cvtsi32_si128(static_cast<int>(32 - distance))));
+}
+
+__attribute__((target("avx2"))) inline __m256i LoadAvx2(
+    const std::uint32_t* p) {
+  return _mm256_loadu_si256(reinterpret_cast<const __m256i*>(p));
+}
+
+// Hashes eight independent elements per iteration, one per 32-bit lane.
+// Returns the number of elements processed; the tail is left to the scalar
+// kernel.
+__attribute__((target("avx2"))) std::int64_t ThreeFry2x32Avx2(
+    const std::uint32_t* key0, const std::uint32_t* key1,
+    const std::uint32_t* data0, const std::uint32_t* data1,
+    std::uint32_t* out0, std::uint32_t* out1, std::int64_t n) {
+  const __m256i parity = _mm256_set1_epi32(static_cast<int>(kParity));
+  std::int64_t idx = 0;
+  for (; idx + 8 <= n; idx += 8) {
+    __m256i ks[3];
+    ks[0] = LoadAvx2(key0 + idx);
+    ks[1] = LoadAvx2(key1 + idx);
+    ks[2] = _mm256_xor_si256(_mm256_xor_si256(ks[0], ks[1]), parity);
+    __m256i x0 = _mm256_add_epi32(LoadAvx2(data0 + idx), ks[0]);
+    __m256i x1 = _mm256_add_epi32(LoadAvx2(data1 + idx), ks[1]);
+    for (int group = 0; group < 5; ++group) {
+      for (int i = 0; i < 4; ++i) {
+        x0 = _mm256_add_epi32(x0, x1);
+        x1 = RotateLeftAvx2(x1, kRotations[(group % 2) * 4 + i]);
+        x1 = _mm256_xor_si256(x0, x1);
+      }
+      x0 = _mm256_add_epi32(x0, ks[(group + 1) % 3]);
+      x1 = _mm256_add_epi32(
+          x1, _mm256_add_epi32(ks[(group + 2) % 3],
+                               _mm256_set1_epi32(group + 1)));
+    }
+    _mm256_storeu_si256(reinterpret_cast<__m256i*>(out0 + idx), x0);
+    _mm256_storeu_si256(reinterpret_cast<__m256i*>(out1 + idx), x1);
+  }
+  return idx;
+}
+
+#endif  // JAX_CPU_PRNG_AVX2
+
+}  // namespace
+
+void CpuThreeFry2x32(void* out, void** data) {
+  std::int64_t n = *reinterpret_cast<std::int64_t*>(data[0]);
+  const auto* key0 = reinterpret_cast<const std::uint32_t*>(data[1]);
+  const auto* key1 = reinterpret_cast<const std::uint32_t*>(data[2]);
+  const auto* data0 = reinterpret_cast<const std::uint32_t*>(data[3]);
+  const auto* data1 = reinterpret_cast<const std::uint32_t*>(data[4]);
+
+  void** out_tuple = reinterpret_cast<void**>(out);
+  auto* out0 = reinterpret_cast<std::uint32_t*>(out_tuple[0]);
+  auto* out1 = reinterpret_cast<std::uint32_t*>(out_tuple[1]);
+
+  std::int64_t done = 0;
+#ifdef JAX_CPU_PRNG_AVX2
+  if (__builtin_cpu_supports("avx2")) {
+    done = ThreeFry2x32Avx2(key0, key1, data0, data1, out0, out1, n);
+  }
+#endif
+  ThreeFry2x32Scalar(key0, key1, data0, data1, out0, out1, done, n);
+}
+
+}  // namespace jax
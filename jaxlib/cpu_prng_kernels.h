@@ -0,0 +1,28 @@
+/* Copyright 2021 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+==============================================================================*/
+
+#ifndef JAXLIB_CPU_PRNG_KERNELS_H_
+#define JAXLIB_CPU_PRNG_KERNELS_H_
+
+namespace jax {
+
+// Threefry2x32 hash as an XLA CPU custom call. The operands are
+// (n: s64[], key0: u32[n], key1: u32[n], data0: u32[n], data1: u32[n]) and the
+// result is a tuple of two u32[n] arrays.
+void CpuThreeFry2x32(void* out, void** data);
+
+}  // namespace jax
+
+#endif  // JAXLIB_CPU_PRNG_KERNELS_H_
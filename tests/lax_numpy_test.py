@@ -51,50 +51,94 @@ FLAGS = config.FLAGS
 
 numpy_version = tuple(map(int, np.__version__.split('.')[:3]))
 
-nonempty_nonscalar_array_shapes = [(4,), (3, 4), (3, 1), (1, 4), (2, 1, 4), (2, 3, 4)]
-nonempty_array_shapes = [()] + nonempty_nonscalar_array_shapes
-one_dim_array_shapes = [(1,), (6,), (12,)]
-empty_array_shapes = [(0,), (0, 4), (3, 0),]
-
-scalar_shapes = [jtu.NUMPY_SCALAR_SHAPE, jtu.PYTHON_SCALAR_SHAPE]
+# The shape and dtype collections below are tuples so that op records and
+# cached helpers can share them by reference.
+nonempty_nonscalar_array_shapes = ((4,), (3, 4), (3, 1), (1, 4), (2, 1, 4), (2, 3, 4))
+nonempty_array_shapes = ((),) + nonempty_nonscalar_array_shapes
+one_dim_array_shapes = ((1,), (6,), (12,))
+empty_array_shapes = ((0,), (0, 4), (3, 0),)
+
+scalar_shapes = (jtu.NUMPY_SCALAR_SHAPE, jtu.PYTHON_SCALAR_SHAPE)
 array_shapes = nonempty_array_shapes + empty_array_shapes
 nonzerodim_shapes = nonempty_nonscalar_array_shapes + empty_array_shapes
 nonempty_shapes = scalar_shapes + nonempty_array_shapes
 all_shapes = scalar_shapes + array_shapes
 
-float_dtypes = jtu.dtypes.all_floating
-complex_dtypes = jtu.dtypes.complex
-int_dtypes = jtu.dtypes.all_integer
-unsigned_dtypes = jtu.dtypes.all_unsigned
-bool_dtypes = jtu.dtypes.boolean
+float_dtypes = tuple(jtu.dtypes.all_floating)
+complex_dtypes = tuple(jtu.dtypes.complex)
+int_dtypes = tuple(jtu.dtypes.all_integer)
+unsigned_dtypes = tuple(jtu.dtypes.all_unsigned)
+bool_dtypes = tuple(jtu.dtypes.boolean)
 default_dtypes = float_dtypes + int_dtypes
 inexact_dtypes = float_dtypes + complex_dtypes
 number_dtypes = float_dtypes + complex_dtypes + int_dtypes
 all_dtypes = number_dtypes + bool_dtypes
 
+# (lhs_dtype, rhs_dtype) pairs shared by the binary linear algebra tests.
+_NUMBER_DTYPE_PAIRS = tuple(
+    itertools.combinations_with_replacement(number_dtypes, 2))
+
+# Most mixed pairs lower to the same dot_general after promotion, so with
+# --jax_skip_slow_tests the dot and matmul tests only use each dtype with
+# itself plus one mixed pair per kind of promotion.
+if FLAGS.jax_skip_slow_tests:
+  _DOT_DTYPE_PAIRS = tuple((d, d) for d in number_dtypes) + tuple(
+      pair for pair in [(np.float32, np.complex64), (np.int32, np.float32),
+                        (jnp.bfloat16, np.float32)]
+      if all(d in number_dtypes for d in pair))
+else:
+  _DOT_DTYPE_PAIRS = _NUMBER_DTYPE_PAIRS
 
-python_scalar_dtypes = [jnp.bool_, jnp.int_, jnp.float_, jnp.complex_]
+
+python_scalar_dtypes = (jnp.bool_, jnp.int_, jnp.float_, jnp.complex_)
 
 # uint64 is problematic because with any uint type it promotes to float:
-int_dtypes_no_uint64 = [d for d in int_dtypes + unsigned_dtypes if d != np.uint64]
+int_dtypes_no_uint64 = tuple(d for d in int_dtypes + unsigned_dtypes
+                             if d != np.uint64)
+
+@functools.lru_cache(maxsize=None)
+def _python_scalar_dtypes_of(dtypes):
+  return tuple(t for t in dtypes if t in python_scalar_dtypes)
 
 def _valid_dtypes_for_shape(shape, dtypes):
   # Not all (shape, dtype) pairs are valid. In particular, Python scalars only
   # have one type in each category (float, bool, etc.)
   if shape is jtu.PYTHON_SCALAR_SHAPE:
-    return [t for t in dtypes if t in python_scalar_dtypes]
+    return _python_scalar_dtypes_of(tuple(dtypes))
   return dtypes
 
+@functools.lru_cache(maxsize=None)
+def _shape_and_dtypes_cached(shapes, dtypes):
+  return tuple((shape, dtype) for shape in shapes
+               for dtype in _valid_dtypes_for_shape(shape, dtypes))
+
 def _shape_and_dtypes(shapes, dtypes):
-  for shape in shapes:
-    for dtype in _valid_dtypes_for_shape(shape, dtypes):
-      yield (shape, dtype)
+  # The same (shapes, dtypes) lists are enumerated by many tests.
+  return _shape_and_dtypes_cached(tuple(shapes), tuple(dtypes))
 
 def _compatible_shapes(shape):
   if shape in scalar_shapes or np.ndim(shape) == 0:
     return [shape]
   return (shape[n:] for n in range(len(shape) + 1))
 
+@functools.lru_cache(maxsize=None)
+def _reduction_axes(shape):
+  # Every axis of `shape`, followed by None for a reduction over all axes.
+  return tuple(range(-len(shape), len(shape))) + (None,)
+
+@functools.lru_cache(maxsize=None)
+def _diagonal_axis_pairs(ndim):
+  """Returns the (axis1, axis2) pairs of distinct axes to test for `ndim`.
+
+  With --jax_skip_slow_tests only a positive, a negative and a mixed pair are
+  generated instead of every pair.
+  """
+  if FLAGS.jax_skip_slow_tests:
+    return ((0, 1), (-1, -2), (0, -1))
+  return tuple((axis1, axis2)
+               for axis1 in range(-ndim, ndim) for axis2 in range(-ndim, ndim)
+               if axis1 % ndim != axis2 % ndim)
+
 def _get_y_shapes(y_dtype, shape, rowvar):
   # Helper function for testCov.
   if y_dtype is None:
@@ -114,8 +158,8 @@ def op_record(name, nargs, dtypes, shapes, rng_factory, diff_modes,
               test_name=None, check_dtypes=True,
               tolerance=None, inexact=False):
   test_name = test_name or name
-  return OpRecord(name, nargs, dtypes, shapes, rng_factory, diff_modes,
-                  test_name, check_dtypes, tolerance, inexact)
+  return OpRecord(name, nargs, tuple(dtypes), tuple(shapes), rng_factory,
+                  diff_modes, test_name, check_dtypes, tolerance, inexact)
 
 JAX_ONE_TO_ONE_OP_RECORDS = [
     op_record("abs", 1, number_dtypes + unsigned_dtypes + bool_dtypes,
@@ -438,48 +482,136 @@ JAX_RIGHT_OPERATOR_OVERLOADS = [
     op_record("__rrshift__", 2, int_dtypes_no_uint64, all_shapes, partial(jtu.rand_int, high=8), [])
 ]
 
+def _return_self(self, other):
+  return self
+
+def _return_not_implemented(self, other):
+  return NotImplemented
+
 class _OverrideEverything(object):
   pass
 
-for rec in JAX_OPERATOR_OVERLOADS + JAX_RIGHT_OPERATOR_OVERLOADS:
-  if rec.nargs == 2:
-    setattr(_OverrideEverything, rec.name, lambda self, other: self)
-
 class _OverrideNothing(object):
   pass
 
+# Checks the class __dict__ rather than hasattr, since object already provides
+# comparison methods such as __eq__ and __lt__ that must be overridden.
 for rec in JAX_OPERATOR_OVERLOADS + JAX_RIGHT_OPERATOR_OVERLOADS:
-  if rec.nargs == 2:
-    setattr(_OverrideNothing, rec.name, lambda self, other: NotImplemented)
+  if rec.nargs == 2 and rec.name not in vars(_OverrideEverything):
+    setattr(_OverrideEverything, rec.name, _return_self)
+    setattr(_OverrideNothing, rec.name, _return_not_implemented)
 
 
+# Maps each integer dtype to its (is_signed, width) pair.
+_INT_INFO = {
+    dtype: (np.issubdtype(dtype, np.signedinteger), np.iinfo(dtype).bits)
+    for dtype in int_dtypes + unsigned_dtypes}
+
 def _dtypes_are_compatible_for_bitwise_ops(args):
   if len(args) <= 1:
     return True
-  is_signed = lambda dtype: jnp.issubdtype(dtype, np.signedinteger)
-  width = lambda dtype: jnp.iinfo(dtype).bits
   x, y = args
-  if width(x) > width(y):
-    x, y = y, x
+  (x_signed, x_width), (y_signed, y_width) = _INT_INFO[x], _INT_INFO[y]
+  if x_width > y_width:
+    x_signed, x_width, y_signed, y_width = y_signed, y_width, x_signed, x_width
   # The following condition seems a little ad hoc, but seems to capture what
   # numpy actually implements.
   return (
-      is_signed(x) == is_signed(y)
-      or (width(x) == 32 and width(y) == 32)
-      or (width(x) == 32 and width(y) == 64 and is_signed(y)))
+      x_signed == y_signed
+      or (x_width == 32 and y_width == 32)
+      or (x_width == 32 and y_width == 64 and y_signed))
 
-def _shapes_are_broadcast_compatible(shapes):
-  accumulator = np.zeros([])
-  for shape in shapes:
+if hasattr(np, "broadcast_shapes"):  # NumPy >= 1.20
+  @functools.lru_cache(maxsize=None)
+  def _shapes_are_broadcast_compatible(shapes):
     try:
-      accumulator = accumulator + np.zeros(shape)
+      np.broadcast_shapes(*(() if isinstance(shape, jtu.ScalarShape) else shape
+                            for shape in shapes))
     except ValueError:
       return False
-  return True
+    return True
+else:
+  @functools.lru_cache(maxsize=None)
+  def _shapes_are_broadcast_compatible(shapes):
+    # Applies the broadcasting rules to the shape tuples directly, rather than
+    # allocating and adding arrays of each shape.
+    out = ()
+    for shape in shapes:
+      if isinstance(shape, jtu.ScalarShape):
+        continue
+      out_dims = []
+      for a, b in itertools.zip_longest(reversed(out), reversed(shape),
+                                        fillvalue=1):
+        if a != 1 and b != 1 and a != b:
+          return False
+        out_dims.append(b if a == 1 else a)
+      out = tuple(reversed(out_dims))
+    return True
 
 def _shapes_are_equal_length(shapes):
   return all(len(shape) == len(shapes[0]) for shape in shapes[1:])
 
+@functools.lru_cache(maxsize=None)
+def _broadcast_compatible_combos(shapes, n):
+  """Returns the broadcast-compatible combinations of `n` of `shapes`.
+
+  Several test generators (and every draw of a sampled generator) enumerate
+  the same combinations, so the filtered tuple is computed only once.
+  """
+  return tuple(filter(_shapes_are_broadcast_compatible,
+                      itertools.combinations_with_replacement(shapes, n)))
+
+@functools.lru_cache(maxsize=None)
+def _dtype_product(dtypes, n):
+  return tuple(itertools.product(dtypes, repeat=n))
+
+def _broadcasting_shapes_and_dtypes(rec):
+  """Lazily yields the broadcast-compatible (shapes, dtypes) pairs of `rec`.
+
+  Test generators sample from these lightweight pairs and only build the
+  parameter dicts (and their names) for the cases that are actually run.
+  """
+  for shapes in _broadcast_compatible_combos(rec.shapes, rec.nargs):
+    if jtu.PYTHON_SCALAR_SHAPE in shapes:
+      dtype_combos = itertools.product(
+          *(_valid_dtypes_for_shape(s, rec.dtypes) for s in shapes))
+    else:
+      # Every shape accepts all of rec.dtypes, so the combinations only depend
+      # on the record's dtypes and arity.
+      dtype_combos = _dtype_product(rec.dtypes, len(shapes))
+    for dtypes in dtype_combos:
+      yield shapes, dtypes
+
+
+@functools.lru_cache(maxsize=None)
+def _operator_fn(name):
+  # Maps an overload name such as "__add__" to the function in `operator`.
+  return getattr(operator, name.strip('_'))
+
+@functools.lru_cache(maxsize=None)
+def _op_tolerance_cached(tolerance, dtypes, x64_enabled):
+  if isinstance(tolerance, frozenset):
+    tolerance = dict(tolerance)
+  tol = max(jtu.tolerance(dtype, tolerance) for dtype in dtypes)
+  return functools.reduce(jtu.join_tolerance,
+                          [tolerance, tol, jtu.default_tolerance()])
+
+def _op_tolerance(tolerance, dtypes):
+  # The tolerance only depends on the op record and the dtypes of a test case,
+  # so it is computed once per distinct combination.
+  if isinstance(tolerance, dict):
+    tolerance = frozenset(tolerance.items())
+  return _op_tolerance_cached(tolerance, tuple(dtypes), config.x64_enabled)
+
+
+@functools.lru_cache(maxsize=None)
+def _cumulative_op_tolerance(dtype, out_dtype, x64_enabled):
+  # x64_enabled is part of the cache key since it changes dtype
+  # canonicalization in jtu.tolerance.
+  tol_thresholds = {dtypes.bfloat16: 4e-2}
+  return max(jtu.tolerance(dtype, tol_thresholds),
+             jtu.tolerance(out_dtype, tol_thresholds))
+
 
 def _promote_like_jnp(fun, inexact=False):
   """Decorator that promotes the arguments of `fun` to `jnp.result_type(*args)`.
@@ -489,27 +621,92 @@ def _promote_like_jnp(fun, inexact=False):
   implementation.
   """
   def wrapper(*args, **kw):
-    flat_args = tree_util.tree_leaves(args)
-    if inexact and not any(jnp.issubdtype(jnp.result_type(x), jnp.inexact)
-                           for x in flat_args):
-      dtype = jnp.result_type(jnp.float_, *flat_args)
+    # Most callers pass a flat sequence of arrays and scalars, which can skip
+    # the pytree machinery; a few (e.g. stack) pass lists of arrays.
+    is_flat = not any(a is None or isinstance(a, (list, tuple, dict))
+                      for a in args)
+    flat_args = args if is_flat else tree_util.tree_leaves(args)
+    arg_dtypes = {getattr(x, 'dtype', None) for x in flat_args}
+    if len(arg_dtypes) == 1 and None not in arg_dtypes:
+      # Fast path for the common case of arrays that all share one dtype.
+      dtype = dtypes.canonicalize_dtype(arg_dtypes.pop())
     else:
       dtype = jnp.result_type(*flat_args)
-    args = tree_util.tree_map(lambda a: np.asarray(a, dtype), args)
+    # The promoted dtype is inexact iff one of the arguments is.
+    if inexact and not jnp.issubdtype(dtype, jnp.inexact):
+      dtype = jnp.result_type(jnp.float_, *flat_args)
+    if is_flat:
+      args = tuple(np.asarray(a, dtype) for a in args)
+    else:
+      args = tree_util.tree_map(lambda a: np.asarray(a, dtype), args)
     return fun(*args, **kw)
   return wrapper
 
 
+@functools.lru_cache(maxsize=None)
+def _promote_types(a, b):
+  return jnp.promote_types(a, b)
+
+def _np_matmul_collapsing_batch(x, y):
+  """np.matmul that issues a single GEMM when only one operand is stacked.
+
+  np.matmul loops over the leading dimensions of a stacked operand even when
+  the other operand is a single matrix or vector. Folding the stack into one
+  2D product (via reshape or np.tensordot) gives the same result. Products of
+  two stacked operands are left to np.matmul.
+  """
+  x, y = np.asarray(x), np.asarray(y)
+  if x.ndim >= 3 and y.ndim == 2:
+    out = np.matmul(x.reshape(-1, x.shape[-1]), y)
+    return out.reshape(x.shape[:-1] + (y.shape[-1],))
+  if x.ndim >= 3 and y.ndim == 1:
+    return np.tensordot(x, y, axes=(-1, 0))
+  if x.ndim <= 2 and y.ndim >= 3:
+    out = np.tensordot(x, y, axes=(-1, -2))
+    # tensordot puts the rows of a matrix `x` before the stacked dimensions.
+    return out if x.ndim == 1 else np.moveaxis(out, 0, -2)
+  return np.matmul(x, y)
+
+def _bfloat16_to_float32(x):
+  """Widens bfloat16 `x` to float32 exactly.
+
+  bfloat16 is the upper half of a float32, so the widening is a 16-bit shift
+  of the raw bits, which NumPy vectorizes, rather than a per-element cast.
+  """
+  bits = np.asarray(x).view(np.uint16).astype(np.uint32) << 16
+  return bits.view(np.float32)
+
+def _bfloat16_upcasting_np_fun(np_op, lhs_dtype, rhs_dtype):
+  """Wraps binary `np_op` as a reference for jnp on `lhs_dtype`, `rhs_dtype`.
+
+  NumPy has no bfloat16 arithmetic, so bfloat16 operands are computed in
+  float32; the result is cast to the jnp promoted type. Which operands need
+  the upcast is decided here, once, rather than on every call.
+  """
+  dtype = _promote_types(lhs_dtype, rhs_dtype)
+  upcast_lhs = lhs_dtype == jnp.bfloat16
+  upcast_rhs = rhs_dtype == jnp.bfloat16
+  if not (upcast_lhs or upcast_rhs):
+    return lambda x, y: np_op(x, y).astype(dtype)
+  def np_fun(x, y):
+    x = _bfloat16_to_float32(x) if upcast_lhs else x
+    y = _bfloat16_to_float32(y) if upcast_rhs else y
+    return np_op(x, y).astype(dtype)
+  return np_fun
+
+
 @jtu.with_config(jax_numpy_rank_promotion="raise")
 class LaxBackedNumpyTests(jtu.JaxTestCase):
   """Tests for LAX-backed Numpy implementation."""
 
   def _GetArgsMaker(self, rng, shapes, dtypes, np_arrays=True):
+    shapes_and_dtypes = [(shape, dtype or jnp.float_)
+                         for shape, dtype in zip(shapes, dtypes)]
+    if np_arrays:
+      return lambda: [rng(shape, dtype) for shape, dtype in shapes_and_dtypes]
     def f():
-      out = [rng(shape, dtype or jnp.float_)
-             for shape, dtype in zip(shapes, dtypes)]
-      if np_arrays:
-        return out
+      out = [rng(shape, dtype) for shape, dtype in shapes_and_dtypes]
+      # Python scalars are left as they are.
       return [jnp.asarray(a) if isinstance(a, (np.ndarray, np.generic)) else a
               for a in out]
     return f
@@ -521,18 +718,14 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         func()
 
   @parameterized.named_parameters(itertools.chain.from_iterable(
-      jtu.cases_from_list(
-        {"testcase_name": jtu.format_test_name_suffix(rec.test_name, shapes,
-                                                      dtypes),
-         "rng_factory": rec.rng_factory, "shapes": shapes, "dtypes": dtypes,
-         "np_op": getattr(np, rec.name), "jnp_op": getattr(jnp, rec.name),
-         "check_dtypes": rec.check_dtypes, "tolerance": rec.tolerance,
-         "inexact": rec.inexact}
-        for shapes in filter(
-          _shapes_are_broadcast_compatible,
-          itertools.combinations_with_replacement(rec.shapes, rec.nargs))
-        for dtypes in itertools.product(
-          *(_valid_dtypes_for_shape(s, rec.dtypes) for s in shapes)))
+      ({"testcase_name": jtu.format_test_name_suffix(rec.test_name, shapes,
+                                                     dtypes),
+        "rng_factory": rec.rng_factory, "shapes": shapes, "dtypes": dtypes,
+        "np_op": getattr(np, rec.name), "jnp_op": getattr(jnp, rec.name),
+        "check_dtypes": rec.check_dtypes, "tolerance": rec.tolerance,
+        "inexact": rec.inexact}
+       for shapes, dtypes in jtu.cases_from_list(
+         _broadcasting_shapes_and_dtypes(rec)))
       for rec in itertools.chain(JAX_ONE_TO_ONE_OP_RECORDS,
                                  JAX_COMPOUND_OP_RECORDS)))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
@@ -545,25 +738,19 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
 
     rng = rng_factory(self.rng())
     args_maker = self._GetArgsMaker(rng, shapes, dtypes, np_arrays=False)
-    tol = max(jtu.tolerance(dtype, tolerance) for dtype in dtypes)
-    tol = functools.reduce(jtu.join_tolerance,
-                           [tolerance, tol, jtu.default_tolerance()])
+    tol = _op_tolerance(tolerance, dtypes)
     self._CheckAgainstNumpy(_promote_like_jnp(np_op, inexact), jnp_op,
                             args_maker, check_dtypes=check_dtypes, tol=tol)
     self._CompileAndCheck(jnp_op, args_maker, check_dtypes=check_dtypes,
                           atol=tol, rtol=tol)
 
   @parameterized.named_parameters(itertools.chain.from_iterable(
-      jtu.cases_from_list(
-        {"testcase_name": jtu.format_test_name_suffix(rec.test_name, shapes,
-                                                      dtypes),
-         "rng_factory": rec.rng_factory, "shapes": shapes, "dtypes": dtypes, "name": rec.name,
-         "tol": rec.tolerance}
-        for shapes in filter(
-          _shapes_are_broadcast_compatible,
-          itertools.combinations_with_replacement(rec.shapes, rec.nargs))
-        for dtypes in itertools.product(
-          *(_valid_dtypes_for_shape(s, rec.dtypes) for s in shapes)))
+      ({"testcase_name": jtu.format_test_name_suffix(rec.test_name, shapes,
+                                                     dtypes),
+        "rng_factory": rec.rng_factory, "shapes": shapes, "dtypes": dtypes, "name": rec.name,
+        "tol": rec.tolerance}
+       for shapes, dtypes in jtu.cases_from_list(
+         _broadcasting_shapes_and_dtypes(rec)))
       for rec in JAX_OPERATOR_OVERLOADS))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
   def testOperatorOverload(self, name, rng_factory, shapes, dtypes, tol):
@@ -571,20 +758,15 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     # np and jnp arrays have different type promotion rules; force the use of
     # jnp arrays.
     args_maker = self._GetArgsMaker(rng, shapes, dtypes, np_arrays=False)
-    fun = lambda *xs: getattr(operator, name.strip('_'))(*xs)
-    self._CompileAndCheck(fun, args_maker, atol=tol, rtol=tol)
+    self._CompileAndCheck(_operator_fn(name), args_maker, atol=tol, rtol=tol)
 
   @parameterized.named_parameters(itertools.chain.from_iterable(
-      jtu.cases_from_list(
-        {"testcase_name": jtu.format_test_name_suffix(rec.test_name, shapes,
-                                                      dtypes),
-         "rng_factory": rec.rng_factory, "shapes": shapes, "dtypes": dtypes, "name": rec.name,
-         "op_tolerance": rec.tolerance}
-        for shapes in filter(
-          _shapes_are_broadcast_compatible,
-          itertools.combinations_with_replacement(rec.shapes, rec.nargs))
-        for dtypes in itertools.product(
-          *(_valid_dtypes_for_shape(s, rec.dtypes) for s in shapes)))
+      ({"testcase_name": jtu.format_test_name_suffix(rec.test_name, shapes,
+                                                     dtypes),
+        "rng_factory": rec.rng_factory, "shapes": shapes, "dtypes": dtypes, "name": rec.name,
+        "op_tolerance": rec.tolerance}
+       for shapes, dtypes in jtu.cases_from_list(
+         _broadcasting_shapes_and_dtypes(rec)))
       for rec in JAX_RIGHT_OPERATOR_OVERLOADS))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
   def testRightOperatorOverload(self, name, rng_factory, shapes, dtypes,
@@ -677,9 +859,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
             rec.test_name, shapes, dtypes),
          "rng_factory": rec.rng_factory, "shapes": shapes, "dtypes": dtypes,
          "np_op": getattr(np, rec.name), "jnp_op": getattr(jnp, rec.name)}
-        for shapes in filter(
-          _shapes_are_broadcast_compatible,
-          itertools.combinations_with_replacement(rec.shapes, rec.nargs))
+        for shapes in _broadcast_compatible_combos(rec.shapes, rec.nargs)
         for dtypes in filter(
           _dtypes_are_compatible_for_bitwise_ops,
           itertools.combinations_with_replacement(rec.dtypes, rec.nargs)))
@@ -699,10 +879,9 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     {"testcase_name": jtu.format_test_name_suffix(op.__name__, shapes, dtypes),
      "op": op, "dtypes": dtypes, "shapes": shapes}
     for op in [jnp.left_shift, jnp.right_shift]
-    for shapes in filter(
-      _shapes_are_broadcast_compatible,
+    for shapes in _broadcast_compatible_combos(
       # TODO numpy always promotes to shift dtype for zero-dim shapes:
-      itertools.combinations_with_replacement(nonzerodim_shapes, 2))
+      nonzerodim_shapes, 2)
     for dtypes in itertools.product(
       *(_valid_dtypes_for_shape(s, int_dtypes_no_uint64) for s in shapes))))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
@@ -734,10 +913,10 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
          "rng_factory": rec.rng_factory, "shape": shape, "dtype": dtype, "out_dtype": out_dtype,
          "np_op": getattr(np, rec.name), "jnp_op": getattr(jnp, rec.name),
          "axis": axis, "keepdims": keepdims, "inexact": rec.inexact}
-        for shape in rec.shapes for dtype in rec.dtypes
-        for out_dtype in [None] + rec.dtypes
-        for axis in list(range(-len(shape), len(shape))) + [None]
-        for keepdims in [False, True])
+        for shape in rec.shapes
+        for dtype, out_dtype, axis, keepdims in itertools.product(
+          rec.dtypes, (None,) + rec.dtypes, _reduction_axes(shape),
+          [False, True]))
       for rec in JAX_REDUCER_RECORDS))
   def testReducer(self, np_op, jnp_op, rng_factory, shape, dtype, out_dtype,
                   axis, keepdims, inexact):
@@ -773,9 +952,9 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         "rng_factory": rec.rng_factory, "shape": shape, "dtype": dtype,
         "np_op": getattr(np, rec.name), "jnp_op": getattr(jnp, rec.name),
         "axis": axis, "keepdims": keepdims, "inexact": rec.inexact}
-        for shape in rec.shapes for dtype in rec.dtypes
-        for axis in list(range(-len(shape), len(shape))) + [None]
-        for keepdims in [False, True])
+        for shape in rec.shapes
+        for dtype, axis, keepdims in itertools.product(
+          rec.dtypes, _reduction_axes(shape), [False, True]))
       for rec in JAX_REDUCER_NO_DTYPE_RECORDS))
   def testReducerNoDtype(self, np_op, jnp_op, rng_factory, shape, dtype, axis,
                          keepdims, inexact):
@@ -805,9 +984,9 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         "rng_factory": rec.rng_factory, "shape": shape, "dtype": dtype,
         "np_op": getattr(np, rec.name), "jnp_op": getattr(jnp, rec.name),
         "initial": initial, "axis": axis, "keepdims": keepdims, "inexact": rec.inexact}
-        for shape in rec.shapes for dtype in rec.dtypes
-        for axis in list(range(-len(shape), len(shape))) + [None]
-        for initial in [0, 1] for keepdims in [False, True])
+        for shape in rec.shapes
+        for dtype, axis, initial, keepdims in itertools.product(
+          rec.dtypes, _reduction_axes(shape), [0, 1], [False, True]))
       for rec in JAX_REDUCER_INITIAL_RECORDS))
   def testReducerInitial(self, np_op, jnp_op, rng_factory, shape, dtype, axis,
                          keepdims, initial, inexact):
@@ -837,14 +1016,14 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         "rng_factory": rec.rng_factory, "shape": shape, "dtype": dtype,
         "np_op": getattr(np, rec.name), "jnp_op": getattr(jnp, rec.name), "whereshape": whereshape,
         "initial": initial, "axis": axis, "keepdims": keepdims, "inexact": rec.inexact}
-        for shape in rec.shapes for dtype in rec.dtypes
-        for whereshape in _compatible_shapes(shape)
-        for axis in list(range(-len(shape), len(shape))) + [None]
-        for initial in [0, 1] for keepdims in [False, True])
+        for shape in rec.shapes
+        for dtype, whereshape, axis, initial, keepdims in itertools.product(
+          rec.dtypes, _compatible_shapes(shape), _reduction_axes(shape),
+          [0, 1], [False, True]))
       for rec in JAX_REDUCER_INITIAL_RECORDS))
   def testReducerWhere(self, np_op, jnp_op, rng_factory, shape, dtype, axis,
                        keepdims, initial, inexact, whereshape):
-    if (shape in [()] + scalar_shapes and
+    if (shape in ((),) + scalar_shapes and
         dtype in [jnp.int16, jnp.uint16] and
         jnp_op in [jnp.min, jnp.max]):
       self.skipTest("Known XLA failure; see https://github.com/google/jax/issues/4971.")
@@ -877,10 +1056,10 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         "rng_factory": rec.rng_factory, "shape": shape, "dtype": dtype,
         "np_op": getattr(np, rec.name), "jnp_op": getattr(jnp, rec.name), "whereshape": whereshape,
         "axis": axis, "keepdims": keepdims, "inexact": rec.inexact}
-      for shape in rec.shapes for dtype in rec.dtypes
-      for whereshape in _compatible_shapes(shape)
-      for axis in list(range(-len(shape), len(shape))) + [None]
-      for keepdims in [False, True])
+      for shape in rec.shapes
+      for dtype, whereshape, axis, keepdims in itertools.product(
+        rec.dtypes, _compatible_shapes(shape), _reduction_axes(shape),
+        [False, True]))
     for rec in JAX_REDUCER_WHERE_NO_INITIAL_RECORDS))
   def testReducerWhereNoInitial(self, np_op, jnp_op, rng_factory, shape, dtype, axis,
                                 keepdims, inexact, whereshape):
@@ -914,7 +1093,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
           jtu.format_shape_dtype_string(shape, dtype), axis),
        "shape": shape, "dtype": dtype, "axis": axis}
       for shape in all_shapes for dtype in all_dtypes
-      for axis in list(range(-len(shape), len(shape))) + [None]))
+      for axis in _reduction_axes(shape)))
   def testCountNonzero(self, shape, dtype, axis):
     rng = jtu.rand_some_zero(self.rng())
     np_fun = lambda x: np.count_nonzero(x, axis)
@@ -1068,18 +1247,16 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
           [(4, 5, 2), (4, 5, 2), (-1, -1, 0, None)], # axisc should do nothing
           [(4, 5, 2), (4, 5, 2), (-1, -1, -1, None)] # same as before
       ]
-      for lhs_dtype, rhs_dtype in itertools.combinations_with_replacement(number_dtypes, 2)))
+      for lhs_dtype, rhs_dtype in _NUMBER_DTYPE_PAIRS))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
   def testCross(self, lhs_shape, lhs_dtype, rhs_shape, rhs_dtype, axes):
     rng = jtu.rand_default(self.rng())
     args_maker = lambda: [rng(lhs_shape, lhs_dtype), rng(rhs_shape, rhs_dtype)]
     axisa, axisb, axisc, axis = axes
     jnp_fun = lambda a, b: jnp.cross(a, b, axisa, axisb, axisc, axis)
-    def np_fun(a, b):
-      a = a.astype(np.float32) if lhs_dtype == jnp.bfloat16 else a
-      b = b.astype(np.float32) if rhs_dtype == jnp.bfloat16 else b
-      out = np.cross(a, b, axisa, axisb, axisc, axis)
-      return out.astype(jnp.promote_types(lhs_dtype, rhs_dtype))
+    np_fun = _bfloat16_upcasting_np_fun(
+        lambda a, b: np.cross(a, b, axisa, axisb, axisc, axis),
+        lhs_dtype, rhs_dtype)
     tol_spec = {dtypes.bfloat16: 3e-1, np.float16: 0.15}
     tol = max(jtu.tolerance(lhs_dtype, tol_spec),
               jtu.tolerance(rhs_dtype, tol_spec))
@@ -1106,7 +1283,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
           ("tensor-matrix", (4, 3, 2), (2, 5)),
           ("matrix-tensor", (5, 2), (3, 2, 4)),
           ("tensor-tensor", (2, 3, 4), (5, 4, 1))]
-      for lhs_dtype, rhs_dtype in itertools.combinations_with_replacement(number_dtypes, 2)))
+      for lhs_dtype, rhs_dtype in _DOT_DTYPE_PAIRS))
   def testDot(self, lhs_shape, lhs_dtype, rhs_shape, rhs_dtype):
     rng = jtu.rand_default(self.rng())
     args_maker = lambda: [rng(lhs_shape, lhs_dtype), rng(rhs_shape, rhs_dtype)]
@@ -1114,10 +1291,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
            np.complex128: 1e-14}
     if jtu.device_under_test() == "tpu":
       tol[np.float16] = tol[np.float32] = tol[np.complex64] = 2e-1
-    def np_dot(x, y):
-      x = x.astype(np.float32) if lhs_dtype == jnp.bfloat16 else x
-      y = y.astype(np.float32) if rhs_dtype == jnp.bfloat16 else y
-      return np.dot(x, y).astype(jnp.promote_types(lhs_dtype, rhs_dtype))
+    np_dot = _bfloat16_upcasting_np_fun(np.dot, lhs_dtype, rhs_dtype)
     self._CheckAgainstNumpy(np_dot, jnp.dot, args_maker,
                             tol=tol)
     self._CompileAndCheck(jnp.dot, args_maker, atol=tol,
@@ -1141,12 +1315,12 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
           ("tensor-matrix", (5, 2, 3), (3, 2)),
           ("tensor-tensor", (5, 3, 4), (5, 4, 1)),
           ("tensor-tensor-broadcast", (3, 1, 3, 4), (5, 4, 1))]
-      for lhs_dtype, rhs_dtype in itertools.combinations_with_replacement(number_dtypes, 2)))
+      for lhs_dtype, rhs_dtype in _DOT_DTYPE_PAIRS))
   def testMatmul(self, lhs_shape, lhs_dtype, rhs_shape, rhs_dtype):
     rng = jtu.rand_default(self.rng())
+    dtype = _promote_types(lhs_dtype, rhs_dtype)
     def np_fun(x, y):
-      dtype = jnp.promote_types(lhs_dtype, rhs_dtype)
-      return np.matmul(x, y).astype(dtype)
+      return _np_matmul_collapsing_batch(x, y).astype(dtype)
     args_maker = lambda: [rng(lhs_shape, lhs_dtype), rng(rhs_shape, rhs_dtype)]
     tol = {np.float16: 1e-2, np.float32: 2e-2, np.float64: 1e-12,
            np.complex128: 1e-12}
@@ -1171,16 +1345,13 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
           [(2, 3, 4), (5, 4, 3, 6), [[1, 2], [2, 1]]],
           [(1, 2, 3, 4), (4, 5, 3, 6), [[2, 3], [2, 0]]],
       ]
-      for lhs_dtype, rhs_dtype in itertools.combinations_with_replacement(number_dtypes, 2)))
+      for lhs_dtype, rhs_dtype in _NUMBER_DTYPE_PAIRS))
   def testTensordot(self, lhs_shape, lhs_dtype, rhs_shape, rhs_dtype, axes):
     rng = jtu.rand_default(self.rng())
     args_maker = lambda: [rng(lhs_shape, lhs_dtype), rng(rhs_shape, rhs_dtype)]
     jnp_fun = lambda a, b: jnp.tensordot(a, b, axes)
-    def np_fun(a, b):
-      a = a if lhs_dtype != jnp.bfloat16 else a.astype(np.float32)
-      b = b if rhs_dtype != jnp.bfloat16 else b.astype(np.float32)
-      dtype = jnp.promote_types(lhs_dtype, rhs_dtype)
-      return np.tensordot(a, b, axes).astype(dtype)
+    np_fun = _bfloat16_upcasting_np_fun(
+        lambda a, b: np.tensordot(a, b, axes), lhs_dtype, rhs_dtype)
     tol = {np.float16: 1e-1, np.float32: 1e-3, np.float64: 1e-12,
            np.complex64: 1e-3, np.complex128: 1e-12}
     if jtu.device_under_test() == "tpu":
@@ -1273,7 +1444,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     rng = jtu.rand_default(self.rng())
     args_maker = lambda: [rng(shape1, dtype1), rng(shape2, dtype2)]
     def np_fun(arg1, arg2):
-      dtype = jnp.promote_types(arg1.dtype, arg2.dtype)
+      dtype = _promote_types(arg1.dtype, arg2.dtype)
       return np.union1d(arg1, arg2).astype(dtype)
     self._CheckAgainstNumpy(np_fun, jnp.union1d, args_maker)
 
@@ -1291,7 +1462,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     rng = jtu.rand_default(self.rng())
     args_maker = lambda: [rng(shape1, dtype1), rng(shape2, dtype2)]
     def np_fun(arg1, arg2):
-      dtype = jnp.promote_types(arg1.dtype, arg2.dtype)
+      dtype = _promote_types(arg1.dtype, arg2.dtype)
       result = np.union1d(arg1, arg2).astype(dtype)
       if size <= len(result):
         return result[:size]
@@ -1363,11 +1534,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
   def testInner(self, lhs_shape, lhs_dtype, rhs_shape, rhs_dtype):
     rng = jtu.rand_default(self.rng())
     args_maker = lambda: [rng(lhs_shape, lhs_dtype), rng(rhs_shape, rhs_dtype)]
-    def np_fun(lhs, rhs):
-      lhs = lhs if lhs_dtype != jnp.bfloat16 else lhs.astype(np.float32)
-      rhs = rhs if rhs_dtype != jnp.bfloat16 else rhs.astype(np.float32)
-      dtype = jnp.promote_types(lhs_dtype, rhs_dtype)
-      return np.inner(lhs, rhs).astype(dtype)
+    np_fun = _bfloat16_upcasting_np_fun(np.inner, lhs_dtype, rhs_dtype)
     jnp_fun = lambda lhs, rhs: jnp.inner(lhs, rhs)
     tol_spec = {np.float16: 1e-2, np.float32: 1e-5, np.float64: 1e-13,
                 np.complex64: 1e-5}
@@ -1455,18 +1622,13 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
                           atol=tol, rtol=tol)
 
   def testOperatorRound(self):
-    self.assertAllClose(round(np.float32(7.532), 1),
-                        round(jnp.float32(7.5), 1))
-    self.assertAllClose(round(np.float32(1.234), 2),
-                        round(jnp.float32(1.234), 2))
-    self.assertAllClose(round(np.float32(1.234)),
-                        round(jnp.float32(1.234)), check_dtypes=False)
-    self.assertAllClose(round(np.float32(7.532), 1),
-                        round(jnp.array(7.5, jnp.float32), 1))
-    self.assertAllClose(round(np.float32(1.234), 2),
+    self.assertAllClose(np.float32(7.5), round(jnp.float32(7.5), 1))
+    self.assertAllClose(np.float32(1.23), round(jnp.float32(1.234), 2))
+    self.assertAllClose(1, round(jnp.float32(1.234)), check_dtypes=False)
+    self.assertAllClose(np.float32(7.5), round(jnp.array(7.5, jnp.float32), 1))
+    self.assertAllClose(np.float32(1.23),
                         round(jnp.array(1.234, jnp.float32), 2))
-    self.assertAllClose(round(np.float32(1.234)),
-                        round(jnp.array(1.234, jnp.float32)),
+    self.assertAllClose(1, round(jnp.array(1.234, jnp.float32)),
                         check_dtypes=False)
 
   @parameterized.named_parameters(jtu.cases_from_list(
@@ -2017,11 +2179,18 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     wrapped_axis = axis % len(base_shape)
     shapes = [base_shape[:wrapped_axis] + (size,) + base_shape[wrapped_axis+1:]
               for size, _ in zip(itertools.cycle([3, 1, 4]), arg_dtypes)]
+    dtype = functools.reduce(_promote_types, arg_dtypes)
+    out_shape = (base_shape[:wrapped_axis] +
+                 (sum(shape[wrapped_axis] for shape in shapes),) +
+                 base_shape[wrapped_axis+1:])
     def np_fun(*args):
-      args = [x if x.dtype != jnp.bfloat16 else x.astype(np.float32)
+      args = [x if x.dtype != jnp.bfloat16 else _bfloat16_to_float32(x)
               for x in args]
-      dtype = functools.reduce(jnp.promote_types, arg_dtypes)
-      return np.concatenate(args, axis=axis).astype(dtype)
+      if dtype == jnp.bfloat16:
+        return np.concatenate(args, axis=axis).astype(dtype)
+      # Writes directly into an array of the jnp result dtype, rather than
+      # into one of NumPy's result dtype followed by a cast.
+      return np.concatenate(args, axis=axis, out=np.empty(out_shape, dtype))
     jnp_fun = lambda *args: jnp.concatenate(args, axis=axis)
 
     def args_maker():
@@ -2064,12 +2233,13 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     wrapped_axis = axis % len(base_shape)
     shapes = [base_shape[:wrapped_axis] + (size,) + base_shape[wrapped_axis+1:]
               for size, _ in zip(itertools.cycle([3, 1, 4]), arg_dtypes)]
+    dtype = _promote_types(*arg_dtypes)
     def np_fun(arr, values):
-      arr = arr.astype(np.float32) if arr.dtype == jnp.bfloat16 else arr
-      values = (values.astype(np.float32) if values.dtype == jnp.bfloat16
+      arr = _bfloat16_to_float32(arr) if arr.dtype == jnp.bfloat16 else arr
+      values = (_bfloat16_to_float32(values) if values.dtype == jnp.bfloat16
                 else values)
       out = np.append(arr, values, axis=axis)
-      return out.astype(jnp.promote_types(*arg_dtypes))
+      return out.astype(dtype)
     jnp_fun = lambda arr, values: jnp.append(arr, values, axis=axis)
 
     def args_maker():
@@ -2339,53 +2509,43 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     self._CheckAgainstNumpy(np_fun, jnp_fun, args_maker)
     self._CompileAndCheck(jnp_fun, args_maker)
 
-  @parameterized.named_parameters(jtu.cases_from_list(
-      {"testcase_name": "_fixed_size={}".format(fixed_size),
-      "fixed_size": fixed_size}
-      for fixed_size in [True, False]))
-  def testNonScalarRepeats(self, fixed_size):
+  # Not sampled: every case is cheap and each one is a distinct regression.
+  @parameterized.named_parameters(
+      {"testcase_name": "_shape={}_repeats={}_axis={}_fixed_size={}".format(
+          shape, str(repeats).replace(" ", ""), axis, fixed_size),
+       "shape": shape, "repeats": repeats, "axis": axis,
+       "fixed_size": fixed_size}
+      for shape, repeats, axis in itertools.chain(
+          [((6,), repeats, axis)
+           for repeats in [2, [1, 3, 0, 1, 1, 2], [1, 3, 2, 1, 1, 2], [2]]
+           for axis in [None, 0]],
+          [((2, 3), repeats, 0) for repeats in [2, [2, 1], [2]]],
+          [((2, 3), repeats, 1) for repeats in [2, [1, 3, 2], [2]]])
+      for fixed_size in [True, False])
+  def testNonScalarRepeats(self, shape, repeats, axis, fixed_size):
     '''
     Following numpy test suite from `test_repeat` at
     https://github.com/numpy/numpy/blob/main/numpy/core/tests/test_multiarray.py
     '''
     tol = 1e-5
+    m = jnp.arange(1, 7).reshape(shape)
+    if not isinstance(repeats, int):
+      repeats = jnp.array(repeats)
 
-    def test_single(m, args_maker, repeats, axis):
-      lax_ans = jnp.repeat(m, repeats, axis)
-      numpy_ans = np.repeat(m, repeats, axis)
-
-      self.assertAllClose(lax_ans, numpy_ans, rtol=tol, atol=tol)
-      if fixed_size:
-
-        # Calculate expected size of the repeated axis.
-        rep_length = np.repeat(np.zeros_like(m), repeats, axis).shape[axis or 0]
-        jnp_fun = lambda arg, rep: jnp.repeat(
-            arg, repeats=rep, axis=axis, total_repeat_length=rep_length)
-      else:
-        jnp_fun = lambda arg: jnp.repeat(arg, repeats = repeats, axis=axis)
-      self._CompileAndCheck(jnp_fun, args_maker)
+    lax_ans = jnp.repeat(m, repeats, axis)
+    numpy_ans = np.repeat(m, repeats, axis)
+    self.assertAllClose(lax_ans, numpy_ans, rtol=tol, atol=tol)
 
-    m = jnp.array([1,2,3,4,5,6])
     if fixed_size:
+      # Calculate expected size of the repeated axis.
+      rep_length = np.repeat(np.zeros_like(m), repeats, axis).shape[axis or 0]
+      jnp_fun = lambda arg, rep: jnp.repeat(
+          arg, repeats=rep, axis=axis, total_repeat_length=rep_length)
       args_maker = lambda: [m, repeats]
     else:
+      jnp_fun = lambda arg: jnp.repeat(arg, repeats=repeats, axis=axis)
       args_maker = lambda: [m]
-
-    for repeats in [2, jnp.array([1,3,0,1,1,2]), jnp.array([1,3,2,1,1,2]), jnp.array([2])]:
-      test_single(m, args_maker, repeats, axis=None)
-      test_single(m, args_maker, repeats, axis=0)
-
-    m_rect = m.reshape((2,3))
-    if fixed_size:
-      args_maker = lambda: [m_rect, repeats]
-    else:
-      args_maker = lambda: [m_rect]
-
-    for repeats in [2, jnp.array([2,1]), jnp.array([2])]:
-      test_single(m_rect, args_maker, repeats, axis=0)
-
-    for repeats in [2, jnp.array([1,3,2]), jnp.array([2])]:
-      test_single(m_rect, args_maker, repeats, axis=1)
+    self._CompileAndCheck(jnp_fun, args_maker)
 
   def testIssue2330(self):
     '''
@@ -2456,9 +2616,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
 
     args_maker = lambda: [rng(shape, dtype)]
 
-    tol_thresholds = {dtypes.bfloat16: 4e-2}
-    tol = max(jtu.tolerance(dtype, tol_thresholds),
-              jtu.tolerance(out_dtype, tol_thresholds))
+    tol = _cumulative_op_tolerance(dtype, out_dtype, config.x64_enabled)
     self._CheckAgainstNumpy(np_fun, jnp_fun, args_maker,
                             tol=tol)
     self._CompileAndCheck(jnp_fun, args_maker)
@@ -2483,9 +2641,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
 
     args_maker = lambda: [rng(shape, dtype)]
 
-    tol_thresholds = {dtypes.bfloat16: 4e-2}
-    tol = max(jtu.tolerance(dtype, tol_thresholds),
-              jtu.tolerance(out_dtype, tol_thresholds))
+    tol = _cumulative_op_tolerance(dtype, out_dtype, config.x64_enabled)
     if dtype != jnp.bfloat16:
       # numpy functions do not properly handle bfloat16
       self._CheckAgainstNumpy(np_fun, jnp_fun, args_maker, check_dtypes=True,
@@ -2688,9 +2844,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
        "axis2": axis2}
       for dtype in default_dtypes
       for shape in [shape for shape in all_shapes if len(shape) >= 2]
-      for axis1 in range(-len(shape), len(shape))
-      for axis2 in [a for a in range(-len(shape), len(shape))
-                    if a % len(shape) != axis1 % len(shape)]
+      for axis1, axis2 in _diagonal_axis_pairs(len(shape))
       for offset in list(range(-4, 4))))
   def testDiagonal(self, shape, dtype, offset, axis1, axis2):
     rng = jtu.rand_default(self.rng())
@@ -2749,8 +2903,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
       for x1_rng_factory_id, x1_rng_factory in
         enumerate([jtu.rand_some_inf_and_nan, jtu.rand_some_zero])
       for x2_rng_factory in [partial(jtu.rand_int, low=-1075, high=1024)]
-      for x1_shape, x2_shape in filter(_shapes_are_broadcast_compatible,
-                                       itertools.combinations_with_replacement(array_shapes, 2))
+      for x1_shape, x2_shape in _broadcast_compatible_combos(array_shapes, 2)
       for x1_dtype in default_dtypes))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
   def testLdexp(self, x1_shape, x1_dtype, x2_shape, x1_rng_factory, x2_rng_factory):
@@ -2801,11 +2954,9 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
        "dtype": dtype, "out_dtype": out_dtype, "shape": shape, "offset": offset,
        "axis1": axis1, "axis2": axis2}
       for dtype in default_dtypes
-      for out_dtype in [None] + number_dtypes
+      for out_dtype in (None,) + number_dtypes
       for shape in [shape for shape in all_shapes if len(shape) >= 2]
-      for axis1 in range(-len(shape), len(shape))
-      for axis2 in range(-len(shape), len(shape))
-      if (axis1 % len(shape)) != (axis2 % len(shape))
+      for axis1, axis2 in _diagonal_axis_pairs(len(shape))
       for offset in list(range(-4, 4))))
   def testTrace(self, shape, dtype, out_dtype, offset, axis1, axis2):
     rng = jtu.rand_default(self.rng())
@@ -2883,20 +3034,22 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     self._CheckAgainstNumpy(jnp_fun, np_fun, args_maker)
     self._CompileAndCheck(jnp_fun, args_maker)
 
-  @parameterized.named_parameters(jtu.cases_from_list(
+  @parameterized.named_parameters(
       {"testcase_name": "_{}_axis={}_array={}".format(
           jtu.format_test_name_suffix("", [shape] * len(dtypes), dtypes), axis, array_input),
        "shape": shape, "axis": axis, "dtypes": dtypes, "array_input": array_input}
-      for dtypes in [
-        [np.float32],
-        [np.float32, np.float32],
-        [np.float32, np.int32, np.float32],
-        [np.float32, np.int64, np.float32],
-        [np.float32, np.int32, np.float64],
-      ]
-      for shape in [(), (2,), (3, 4), (1, 100)]
-      for axis in range(-len(shape), len(shape) + 1)
-      for array_input in [True, False]))
+      for dtypes, shape, axis, array_input in jtu.cases_from_list(
+        (dtypes, shape, axis, array_input)
+        for dtypes in [
+          [np.float32],
+          [np.float32, np.float32],
+          [np.float32, np.int32, np.float32],
+          [np.float32, np.int64, np.float32],
+          [np.float32, np.int32, np.float64],
+        ]
+        for shape in [(), (2,), (3, 4), (1, 100)]
+        for axis in range(-len(shape), len(shape) + 1)
+        for array_input in [True, False]))
   def testStack(self, shape, axis, dtypes, array_input):
     rng = jtu.rand_default(self.rng())
     if array_input:
@@ -2908,20 +3061,22 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     self._CheckAgainstNumpy(jnp_fun, np_fun, args_maker)
     self._CompileAndCheck(jnp_fun, args_maker)
 
-  @parameterized.named_parameters(jtu.cases_from_list(
+  @parameterized.named_parameters(
       {"testcase_name": "_op={}_{}_array={}".format(
           op, jtu.format_test_name_suffix("", [shape] * len(dtypes), dtypes), array_input),
        "shape": shape, "op": op, "dtypes": dtypes, "array_input": array_input}
-      for op in ["hstack", "vstack", "dstack"]
-      for dtypes in [
-        [np.float32],
-        [np.float32, np.float32],
-        [np.float32, np.int32, np.float32],
-        [np.float32, np.int64, np.float32],
-        [np.float32, np.int32, np.float64],
-      ]
-      for shape in [(), (2,), (3, 4), (1, 100), (2, 3, 4)]
-      for array_input in [True, False]))
+      for op, dtypes, shape, array_input in jtu.cases_from_list(
+        (op, dtypes, shape, array_input)
+        for op in ["hstack", "vstack", "dstack"]
+        for dtypes in [
+          [np.float32],
+          [np.float32, np.float32],
+          [np.float32, np.int32, np.float32],
+          [np.float32, np.int64, np.float32],
+          [np.float32, np.int32, np.float64],
+        ]
+        for shape in [(), (2,), (3, 4), (1, 100), (2, 3, 4)]
+        for array_input in [True, False]))
   def testHVDStack(self, shape, op, dtypes, array_input):
     rng = jtu.rand_default(self.rng())
     if array_input:
@@ -2933,17 +3088,20 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     self._CheckAgainstNumpy(jnp_fun, np_fun, args_maker)
     self._CompileAndCheck(jnp_fun, args_maker)
 
-  @parameterized.named_parameters(jtu.cases_from_list(
+  @parameterized.named_parameters(
       {"testcase_name": "_inshape={}_outdtype={}_fillshape={}".format(
           jtu.format_shape_dtype_string(shape, fill_value_dtype),
           np.dtype(out_dtype).name if out_dtype else "None",
           fill_value_shape),
        "fill_value_dtype": fill_value_dtype, "fill_value_shape": fill_value_shape,
        "shape": shape, "out_dtype": out_dtype}
-      for shape in array_shapes + [3, np.array(7, dtype=np.int32)]
-      for fill_value_dtype in default_dtypes
-      for fill_value_shape in _compatible_shapes(shape)
-      for out_dtype in [None] + default_dtypes))
+      for shape, fill_value_dtype, fill_value_shape, out_dtype
+      in jtu.cases_from_list(
+        (shape, fill_value_dtype, fill_value_shape, out_dtype)
+        for shape in array_shapes + (3, np.array(7, dtype=np.int32))
+        for fill_value_dtype in default_dtypes
+        for fill_value_shape in _compatible_shapes(shape)
+        for out_dtype in (None,) + default_dtypes))
   def testFull(self, shape, fill_value_dtype, fill_value_shape, out_dtype):
     rng = jtu.rand_default(self.rng())
     np_fun = lambda fill_value: np.full(shape, fill_value, dtype=out_dtype)
@@ -3017,7 +3175,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
        "fill_value_dtype": fill_value_dtype, "fill_value_shape": fill_value_shape,
        "out_dtype": out_dtype, "out_shape": out_shape
     } for shape in s(array_shapes)
-      for out_shape in s([None] + array_shapes)
+      for out_shape in s((None,) + array_shapes)
       for in_dtype in s(default_dtypes)
       for fill_value_dtype in s(default_dtypes)
       for fill_value_shape in s(_compatible_shapes(shape if out_shape is None else out_shape))
@@ -3041,7 +3199,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
        "func": func, "shape": shape, "in_dtype": in_dtype,
        "out_shape": out_shape, "out_dtype": out_dtype}
       for shape in array_shapes
-      for out_shape in [None] + array_shapes
+      for out_shape in (None,) + array_shapes
       for in_dtype in default_dtypes
       for func in ["ones_like", "zeros_like"]
       for out_dtype in default_dtypes))
@@ -3110,15 +3268,17 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     self.assertEqual(op(x).aval.weak_type, weak_type)
     self.assertEqual(jax.jit(op)(x).aval.weak_type, weak_type)
 
-  @parameterized.named_parameters(jtu.cases_from_list(
+  @parameterized.named_parameters(
       {"testcase_name": "_{}_axis={}_{}sections".format(
           jtu.format_shape_dtype_string(shape, dtype), axis, num_sections),
        "shape": shape, "num_sections": num_sections, "axis": axis,
        "dtype": dtype}
-      for shape, axis, num_sections in [
-          ((3,), 0, 3), ((12,), 0, 3), ((12, 4), 0, 4), ((12, 4), 1, 2),
-          ((2, 3, 4), -1, 2), ((2, 3, 4), -2, 3)]
-      for dtype in default_dtypes))
+      for shape, axis, num_sections, dtype in jtu.cases_from_list(
+        (shape, axis, num_sections, dtype)
+        for shape, axis, num_sections in [
+            ((3,), 0, 3), ((12,), 0, 3), ((12, 4), 0, 4), ((12, 4), 1, 2),
+            ((2, 3, 4), -1, 2), ((2, 3, 4), -2, 3)]
+        for dtype in default_dtypes))
   def testSplitStaticInt(self, shape, num_sections, axis, dtype):
     rng = jtu.rand_default(self.rng())
     np_fun = lambda x: np.split(x, num_sections, axis=axis)
@@ -3307,25 +3467,27 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     self._CheckAgainstNumpy(np_fun, jnp_fun, args_maker)
     self._CompileAndCheck(jnp_fun, args_maker)
 
-  @parameterized.named_parameters(jtu.cases_from_list(
+  @parameterized.named_parameters(
       {"testcase_name": "_inshape={}_outshape={}_order={}".format(
           jtu.format_shape_dtype_string(arg_shape, dtype),
           jtu.format_shape_dtype_string(out_shape, dtype),
           order),
        "arg_shape": arg_shape, "out_shape": out_shape, "dtype": dtype,
        "order": order}
-      for dtype in default_dtypes
-      for order in ["C", "F"]
-      for arg_shape, out_shape in [
-          (jtu.NUMPY_SCALAR_SHAPE, (1, 1, 1)),
-          ((), (1, 1, 1)),
-          ((7, 0), (0, 42, 101)),
-          ((3, 4), 12),
-          ((3, 4), (12,)),
-          ((3, 4), -1),
-          ((2, 1, 4), (-1,)),
-          ((2, 2, 4), (2, 8))
-      ]))
+      for dtype, order, arg_shape, out_shape in jtu.cases_from_list(
+        (dtype, order, arg_shape, out_shape)
+        for dtype in default_dtypes
+        for order in ["C", "F"]
+        for arg_shape, out_shape in [
+            (jtu.NUMPY_SCALAR_SHAPE, (1, 1, 1)),
+            ((), (1, 1, 1)),
+            ((7, 0), (0, 42, 101)),
+            ((3, 4), 12),
+            ((3, 4), (12,)),
+            ((3, 4), -1),
+            ((2, 1, 4), (-1,)),
+            ((2, 2, 4), (2, 8))
+        ]))
   def testReshape(self, arg_shape, out_shape, dtype, order):
     rng = jtu.rand_default(self.rng())
     np_fun = lambda x: np.reshape(x, out_shape, order=order)
@@ -4113,7 +4275,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
        "shape": shape, "index_shape": index_shape, "dtype": dtype,
        "index_dtype": index_dtype, "axis": axis, "mode": mode}
       for shape in [(3,), (3, 4), (3, 4, 5)]
-      for index_shape in scalar_shapes + [(3,), (2, 1, 3)]
+      for index_shape in scalar_shapes + ((3,), (2, 1, 3))
       for axis in itertools.chain(range(-len(shape), len(shape)),
                                   [cast(Optional[int], None)])
       for dtype in all_dtypes
@@ -4156,8 +4318,8 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
        "x_shape": x_shape, "i_shape": i_shape, "dtype": dtype,
        "index_dtype": index_dtype, "axis": axis}
       for x_shape, i_shape in filter(
-        _shapes_are_equal_length,
-        filter(_shapes_are_broadcast_compatible,
+        _shapes_are_broadcast_compatible,
+        filter(_shapes_are_equal_length,
                itertools.combinations_with_replacement(nonempty_nonscalar_array_shapes, 2)))
       for axis in itertools.chain(range(len(x_shape)), [-1],
                                   [cast(Optional[int], None)])
@@ -4166,16 +4328,15 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
   def testTakeAlongAxis(self, x_shape, i_shape, dtype, index_dtype, axis):
     rng = jtu.rand_default(self.rng())
 
-    i_shape = np.array(i_shape)
     if axis is None:
-      i_shape = [np.prod(i_shape, dtype=np.int64)]
+      i_shape = [prod(i_shape)]
     else:
       # Test the case where the size of the axis doesn't necessarily broadcast.
-      i_shape[axis] *= 3
       i_shape = list(i_shape)
+      i_shape[axis] *= 3
     def args_maker():
       x = rng(x_shape, dtype)
-      n = np.prod(x_shape, dtype=np.int32) if axis is None else x_shape[axis]
+      n = prod(x_shape) if axis is None else x_shape[axis]
       if np.issubdtype(index_dtype, np.unsignedinteger):
         index_rng = jtu.rand_int(self.rng(), 0, n)
       else:
@@ -4231,10 +4392,9 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     dtype = np.dtype(dtypes.canonicalize_dtype(dtype)).type
     def np_fun(x):
       if dtype == jnp.bfloat16:
-        x = np.where(np.isnan(x), dtype(0), x)
-        x = np.where(np.isposinf(x), jnp.finfo(dtype).max, x)
-        x = np.where(np.isneginf(x), jnp.finfo(dtype).min, x)
-        return x
+        return np.select([np.isnan(x), np.isposinf(x), np.isneginf(x)],
+                         [dtype(0), jnp.finfo(dtype).max, jnp.finfo(dtype).min],
+                         x)
       else:
         return np.nan_to_num(x).astype(dtype)
 
@@ -4304,7 +4464,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
           ((4, 101), 1),
         )
         for q_dtype in [np.float32]
-        for q_shape in scalar_shapes + [(4,)]
+        for q_shape in scalar_shapes + ((4,),)
         for keepdims in [False, True]
         for interpolation in ['linear', 'lower', 'higher', 'nearest',
                               'midpoint']))
@@ -4398,8 +4558,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         jtu.format_shape_dtype_string(shape, dtype)
         for shape, dtype in zip(shapes, dtypes))),
       "shapes": shapes, "dtypes": dtypes
-    } for shapes in s(filter(_shapes_are_broadcast_compatible,
-                         itertools.combinations_with_replacement(all_shapes, 3)))
+    } for shapes in s(_broadcast_compatible_combos(all_shapes, 3))
       for dtypes in s(itertools.combinations_with_replacement(all_dtypes, 3)))))
   def testWhereThreeArgument(self, shapes, dtypes):
     rng = jtu.rand_default(self.rng())
@@ -4418,9 +4577,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
       "testcase_name": jtu.format_test_name_suffix("", shapes, (np.bool_,) * n + dtypes),
       "shapes": shapes, "dtypes": dtypes
     } for n in s(range(1, 3))
-      for shapes in s(filter(
-          _shapes_are_broadcast_compatible,
-          itertools.combinations_with_replacement(all_shapes, 2 * n + 1)))
+      for shapes in s(_broadcast_compatible_combos(all_shapes, 2 * n + 1))
       for dtypes in s(itertools.combinations_with_replacement(all_dtypes, n + 1)))))
   def testSelect(self, shapes, dtypes):
     rng = jtu.rand_default(self.rng())
@@ -5065,7 +5222,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         # floating-point compute between jitted platforms and non-jit + rounding
         # cause unavoidable variation in integer truncation for some inputs, so
         # we currently only test inexact 'dtype' arguments.
-        for dtype in inexact_dtypes + [None,]))
+        for dtype in inexact_dtypes + (None,)))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
   def testLinspace(self, start_shape, stop_shape, num, endpoint, retstep, dtype):
     rng = jtu.rand_default(self.rng())
@@ -5126,7 +5283,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         for num in [0, 1, 2, 5, 20]
         for endpoint in [True, False]
         for base in [10.0, 2, np.e]
-        for dtype in inexact_dtypes + [None,]))
+        for dtype in inexact_dtypes + (None,)))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
   def testLogspace(self, start_shape, stop_shape, num,
                    endpoint, base, dtype):
@@ -5154,7 +5311,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
                            base=base, dtype=dtype, axis=axis)
       self._CheckAgainstNumpy(np_op, jnp_op, args_maker,
                               check_dtypes=False, tol=tol)
-      if dtype in (inexact_dtypes + [None,]):
+      if dtype in (inexact_dtypes + (None,)):
         # Why do compiled and op-by-op float16 np.power numbers differ
         # slightly more than expected?
         atol = {np.float16: 1e-2}
@@ -5176,7 +5333,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         for num in [0, 1, 2, 5, 20]
         for endpoint in [True, False]
         # NB: numpy's geomspace gives nonsense results on integer types
-        for dtype in inexact_dtypes + [None,]
+        for dtype in inexact_dtypes + (None,)
         for axis in range(-max(len(start_shape), len(stop_shape)),
                           max(len(start_shape), len(stop_shape)))))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
@@ -5213,7 +5370,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
         axis=axis).astype(dtype)
     self._CheckAgainstNumpy(np_op, jnp_op, args_maker,
                             check_dtypes=False, tol=tol)
-    if dtype in (inexact_dtypes + [None,]):
+    if dtype in (inexact_dtypes + (None,)):
       self._CompileAndCheck(jnp_op, args_maker,
                             check_dtypes=False, atol=tol, rtol=tol)
 
@@ -5350,53 +5507,27 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
     self.assertIsInstance(np.broadcast_to(10.0, ()), np.ndarray)
 
   def testPrecision(self):
-
-    ones_1d = np.ones((2,))
-    ones_2d = np.ones((2, 2))
-    ones_3d = np.ones((2, 2, 2))
     HIGHEST = lax.Precision.HIGHEST
-
-    jtu.assert_dot_precision(None, jnp.dot, ones_1d, ones_1d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.dot, precision=HIGHEST),
-        ones_1d, ones_1d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.dot, precision=HIGHEST),
-        ones_3d, ones_3d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.matmul, precision=HIGHEST),
-        ones_2d, ones_2d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.vdot, precision=HIGHEST),
-        ones_1d, ones_1d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.tensordot, axes=2, precision=HIGHEST),
-        ones_2d, ones_2d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.tensordot, axes=(0, 0), precision=HIGHEST),
-        ones_1d, ones_1d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.tensordot, axes=((0,), (0,)), precision=HIGHEST),
-        ones_1d, ones_1d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.einsum, 'i,i', precision=HIGHEST),
-        ones_1d, ones_1d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.einsum, 'ij,ij', precision=HIGHEST),
-        ones_2d, ones_2d)
-    jtu.assert_dot_precision(
-        HIGHEST,
-        partial(jnp.inner, precision=HIGHEST),
-        ones_1d, ones_1d)
+    cases = [
+        ("dot_default", jnp.dot, {}, (2,), None),
+        ("dot_1d", jnp.dot, {}, (2,), HIGHEST),
+        ("dot_3d", jnp.dot, {}, (2, 2, 2), HIGHEST),
+        ("matmul", jnp.matmul, {}, (2, 2), HIGHEST),
+        ("vdot", jnp.vdot, {}, (2,), HIGHEST),
+        ("tensordot_int", jnp.tensordot, {"axes": 2}, (2, 2), HIGHEST),
+        ("tensordot_pair", jnp.tensordot, {"axes": (0, 0)}, (2,), HIGHEST),
+        ("tensordot_seqs", jnp.tensordot, {"axes": ((0,), (0,))}, (2,),
+         HIGHEST),
+        ("einsum_1d", partial(jnp.einsum, 'i,i'), {}, (2,), HIGHEST),
+        ("einsum_2d", partial(jnp.einsum, 'ij,ij'), {}, (2, 2), HIGHEST),
+        ("inner", jnp.inner, {}, (2,), HIGHEST),
+    ]
+    for name, fun, kwargs, shape, precision in cases:
+      with self.subTest(name):
+        if precision is not None:
+          kwargs = dict(kwargs, precision=precision)
+        ones = np.ones(shape)
+        jtu.assert_dot_precision(precision, partial(fun, **kwargs), ones, ones)
 
   @parameterized.named_parameters(
       jtu.cases_from_list(
@@ -5486,9 +5617,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
   @parameterized.named_parameters(jtu.cases_from_list(
     {"testcase_name": jtu.format_test_name_suffix("", shapes, dtypes),
      "shapes": shapes, "dtypes": dtypes}
-    for shapes in filter(
-      _shapes_are_broadcast_compatible,
-      itertools.combinations_with_replacement(all_shapes, 2))
+    for shapes in _broadcast_compatible_combos(all_shapes, 2)
     for dtypes in itertools.product(
       *(_valid_dtypes_for_shape(s, complex_dtypes) for s in shapes))))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
@@ -5509,9 +5638,7 @@ class LaxBackedNumpyTests(jtu.JaxTestCase):
   @parameterized.named_parameters(jtu.cases_from_list(
     {"testcase_name": jtu.format_test_name_suffix("", shapes, dtypes),
      "shapes": shapes, "dtypes": dtypes}
-    for shapes in filter(
-      _shapes_are_broadcast_compatible,
-      itertools.combinations_with_replacement(all_shapes, 2))
+    for shapes in _broadcast_compatible_combos(all_shapes, 2)
     for dtypes in itertools.product(
       *(_valid_dtypes_for_shape(s, complex_dtypes) for s in shapes))))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
@@ -5574,13 +5701,13 @@ GRAD_SPECIAL_VALUE_TEST_RECORDS = [
 class NumpyGradTests(jtu.JaxTestCase):
 
   @parameterized.named_parameters(itertools.chain.from_iterable(
-      jtu.cases_from_list(
-        {"testcase_name": jtu.format_test_name_suffix(
+      [{"testcase_name": jtu.format_test_name_suffix(
             rec.name, shapes, itertools.repeat(dtype)),
-         "op": rec.op, "rng_factory": rec.rng_factory, "shapes": shapes, "dtype": dtype,
-         "order": rec.order, "tol": rec.tol}
-        for shapes in itertools.combinations_with_replacement(nonempty_shapes, rec.nargs)
-        for dtype in rec.dtypes)
+        "op": rec.op, "rng_factory": rec.rng_factory, "shapes": shapes, "dtype": dtype,
+        "order": rec.order, "tol": rec.tol}
+       for shapes, dtype in jtu.cases_from_list(itertools.product(
+           itertools.combinations_with_replacement(nonempty_shapes, rec.nargs),
+           rec.dtypes))]
       for rec in GRAD_TEST_RECORDS))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
   def testOpGrad(self, op, rng_factory, shapes, dtype, order, tol):
@@ -5644,9 +5771,7 @@ class NumpyGradTests(jtu.JaxTestCase):
   @parameterized.named_parameters(jtu.cases_from_list(
     {"testcase_name": jtu.format_test_name_suffix("", shapes, itertools.repeat(dtype)),
      "shapes": shapes, "dtype": dtype}
-    for shapes in filter(
-      _shapes_are_broadcast_compatible,
-      itertools.combinations_with_replacement(nonempty_shapes, 2))
+    for shapes in _broadcast_compatible_combos(nonempty_shapes, 2)
     for dtype in (np.complex128, )))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
   def testGradLogaddexpComplex(self, shapes, dtype):
@@ -5661,9 +5786,7 @@ class NumpyGradTests(jtu.JaxTestCase):
   @parameterized.named_parameters(jtu.cases_from_list(
     {"testcase_name": jtu.format_test_name_suffix("", shapes, itertools.repeat(dtype)),
      "shapes": shapes, "dtype": dtype}
-    for shapes in filter(
-      _shapes_are_broadcast_compatible,
-      itertools.combinations_with_replacement(nonempty_shapes, 2))
+    for shapes in _broadcast_compatible_combos(nonempty_shapes, 2)
     for dtype in (np.complex128, )))
   @jax.numpy_rank_promotion('allow')  # This test explicitly exercises implicit rank promotion.
   def testGradLogaddexp2Complex(self, shapes, dtype):
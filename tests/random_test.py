@@ -139,6 +139,20 @@ class PrngTest(jtu.JaxTestCase):
     rand_bits_32 = np.array([np.array(r).view(np.uint32) for r in rand_bits])
     assert np.all(rand_bits_32 == rand_bits_32[0])
 
+  def testThreefryPartitionableOffTpu(self):
+    # The flag only switches to RngBitGenerator when lowering for TPU; on other
+    # platforms the bits must match the default implementation, eagerly, under
+    # jit and under vmap.
+    if jtu.device_under_test() == "tpu":
+      raise SkipTest("RngBitGenerator streams differ on TPU")
+    keys = random.split(random.PRNGKey(1701), 3)
+    bits = lambda key: jax._src.random._random_bits(key, 32, (4, 5))
+    expected = [bits(key) for key in keys]
+    with jax._src.config.threefry_partitionable(True):
+      self.assertArraysEqual(bits(keys[0]), expected[0])
+      self.assertArraysEqual(jax.jit(bits)(keys[0]), expected[0])
+      self.assertArraysEqual(jax.vmap(bits)(keys), np.stack(expected))
+
   def testPRNGValues(self):
     # Test to ensure consistent random values between JAX versions
     k = random.PRNGKey(0)
@@ -254,9 +268,10 @@ class LaxRandomTest(jtu.JaxTestCase):
 
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_dtype={}".format(np.dtype(dtype).name), "dtype": dtype}
-      for dtype in jtu.dtypes.floating))
+      for dtype in jtu.dtypes.all_floating))
   def testNumpyAndXLAAgreeOnFloatEndianness(self, dtype):
-    bits_dtype = np.uint32 if jnp.finfo(dtype).bits == 32 else np.uint64
+    bits_dtype = {16: np.uint16, 32: np.uint32,
+                  64: np.uint64}[jnp.finfo(dtype).bits]
     numpy_bits = np.array(1., dtype).view(bits_dtype)
     xla_bits = jax.jit(
         lambda: lax.bitcast_convert_type(np.array(1., dtype), bits_dtype))()
@@ -501,11 +516,18 @@ class LaxRandomTest(jtu.JaxTestCase):
       x = random.bernoulli(key, np.array([0.2, 0.3]), shape=(3, 2))
     assert x.shape == (3, 2)
 
+  def testBernoulliMatchesUniform(self):
+    key = self.seed_prng(0)
+    p = np.array([[0., 0.1, 0.3, 0.5, 0.9, 1., np.nan]], np.float32)
+    shape = (1000, p.shape[1])
+    expected = random.uniform(key, shape, np.float32) < p
+    self.assertArraysEqual(random.bernoulli(key, p, shape), expected)
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_a={}_b={}_dtype={}".format(a, b, np.dtype(dtype).name),
        "a": a, "b": b, "dtype": dtype}
-      for a in [0.2, 5.]
-      for b in [0.2, 5.]
+      for a in [0.2, 1., 5.]
+      for b in [0.2, 1., 5.]
       for dtype in [np.float64]))  # NOTE: KS test fails with float32
   def testBeta(self, a, b, dtype):
     if not config.x64_enabled:
@@ -520,6 +542,15 @@ class LaxRandomTest(jtu.JaxTestCase):
     for samples in [uncompiled_samples, compiled_samples]:
       self._CheckKolmogorovSmirnovCDF(samples, scipy.stats.beta(a, b).cdf)
 
+  def testBetaUnitParameterMatchesJit(self):
+    # A concrete a or b of 1 must not select a different sampler than a traced
+    # one, or the same key would give different streams under jit.
+    key = self.seed_prng(0)
+    rand = lambda key, a, b: random.beta(key, a, b, (100,))
+    crand = jax.jit(rand)
+    for a, b in [(1., 5.), (5., 1.), (1., 1.)]:
+      self.assertAllClose(rand(key, a, b), crand(key, a, b))
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_dtype={}".format(np.dtype(dtype).name), "dtype": dtype}
       for dtype in float_dtypes))
@@ -591,6 +622,13 @@ class LaxRandomTest(jtu.JaxTestCase):
     x = random.gamma(key, np.array([0.2, 0.3]), shape=(3, 2))
     assert x.shape == (3, 2)
 
+  def testGammaVmap(self):
+    key = self.seed_prng(0)
+    alphas = np.array([0.2, 5.])
+    samples = vmap(lambda a: random.gamma(key, a, (10000,)))(alphas)
+    for alpha, sample in zip(alphas, samples):
+      self._CheckKolmogorovSmirnovCDF(sample, scipy.stats.gamma(alpha).cdf)
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_a={}".format(alpha), "alpha": alpha}
       for alpha in [1e-4, 1e-3, 1e-2, 1e-1, 1e0, 1e1, 1e2, 1e3, 1e4]))
@@ -102,6 +102,19 @@ class TestBFGS(jtu.JaxTestCase):
     results = jax.scipy.optimize.minimize(f, jnp.ones(n), method='BFGS')
     self.assertAllClose(results.x, jnp.zeros(n), atol=1e-6, rtol=1e-6)
 
+  def test_minimize_custom_vjp(self):
+    # The line search must not require forward-mode derivatives of `fun`.
+    @jax.custom_vjp
+    def f(x):
+      return rosenbrock(jnp)(x)
+    f.defvjp(lambda x: (f(x), x),
+             lambda x, g: (g * jax.grad(rosenbrock(jnp))(x),))
+    x0 = jnp.zeros(2)
+    jax_res = jax.scipy.optimize.minimize(f, x0, method='BFGS')
+    expected = jax.scipy.optimize.minimize(rosenbrock(jnp), x0, method='BFGS')
+    self.assertTrue(jax_res.success)
+    self.assertAllClose(jax_res.x, expected.x, check_dtypes=False)
+
   @jtu.skip_on_flag('jax_enable_x64', False)
   def test_zakharov(self):
     def zakharov_fn(x):
@@ -35,12 +35,14 @@ scipy_version = tuple(map(int, osp.version.version.split('.')[:2]))
 
 
 def genNamedParametersNArgs(n):
+    # Sample the (shapes, dtypes) pairs first and only format names for the
+    # cases that are kept.
     return parameterized.named_parameters(
-        jtu.cases_from_list(
-          {"testcase_name": jtu.format_test_name_suffix("", shapes, dtypes),
-            "shapes": shapes, "dtypes": dtypes}
-          for shapes in itertools.combinations_with_replacement(all_shapes, n)
-          for dtypes in itertools.combinations_with_replacement(jtu.dtypes.floating, n)))
+        {"testcase_name": jtu.format_test_name_suffix("", shapes, dtypes),
+          "shapes": shapes, "dtypes": dtypes}
+        for shapes, dtypes in jtu.cases_from_list(itertools.product(
+            itertools.combinations_with_replacement(all_shapes, n),
+            itertools.combinations_with_replacement(jtu.dtypes.floating, n))))
 
 
 class LaxBackedScipyStatsTests(jtu.JaxTestCase):
@@ -1,11 +1,14 @@
+from unittest import SkipTest
+
 import numpy as np
 from absl.testing import absltest, parameterized
 
+import jax
 from jax import grad
 from jax.config import config
 import jax.numpy as jnp
 import jax._src.test_util as jtu
-from jax._src.scipy.optimize.line_search import line_search
+from jax._src.scipy.optimize.line_search import line_search, line_search_batched
 from scipy.optimize.linesearch import line_search_wolfe2
 
 
@@ -162,6 +165,99 @@ class TestLineSearch(jtu.JaxTestCase):
     self.assertAllClose(scipy_res[0], res.a_k, atol=1e-5, check_dtypes=False)
     self.assertAllClose(scipy_res[3], res.f_k, atol=1e-5, check_dtypes=False)
 
+  def test_line_search_parallel_zoom(self):
+    f = lambda x: jnp.dot(x, x)
+    fp = lambda x: 2 * x
+    x = jnp.ones(5)
+    # The unit step overshoots the minimum at s = 1/3, so a zoom is needed.
+    p = -3 * jnp.ones(5)
+
+    res = line_search(f, x, p, parallel_zoom=True)
+    self.assertFalse(res.failed)
+    self.assert_line_wolfe(x, p, res.a_k, f, fp)
+    self.assertAllClose(res.f_k, f(x + res.a_k * p), check_dtypes=False)
+    self.assertAllClose(res.g_k, fp(x + res.a_k * p), check_dtypes=False)
+
+  def test_line_search_wider_objective_dtype(self):
+    # A float64 objective of a float32 point must not widen the step sizes
+    # carried through the bracketing and zoom loops.
+    if not config.x64_enabled:
+      raise SkipTest("requires x64")
+    f = lambda x: jnp.dot(x, x).astype(jnp.float64)
+    x = jnp.ones(5, jnp.float32)
+    # The unit step overshoots the minimum at s = 1/3, so a zoom is needed.
+    p = -3 * jnp.ones(5, jnp.float32)
+
+    for parallel_zoom in [False, True]:
+      res = line_search(f, x, p, parallel_zoom=parallel_zoom)
+      self.assertFalse(res.failed)
+      self.assertEqual(res.a_k.dtype, jnp.float32)
+      self.assertEqual(res.f_k.dtype, jnp.float64)
+
+  def test_line_search_nfev_without_zoom(self):
+    f = lambda x: jnp.dot(x, x)
+    x = jnp.ones(5)
+    # The unit step lands on the minimum, so it is accepted without zooming.
+    p = -jnp.ones(5)
+
+    for parallel_zoom in [False, True]:
+      res = line_search(f, x, p, parallel_zoom=parallel_zoom)
+      self.assertFalse(res.failed)
+      # One evaluation at the start point and one at the accepted step.
+      self.assertEqual(res.nfev, 2)
+
+  def test_line_search_custom_vjp(self):
+    # Objectives that only define reverse-mode derivatives are supported by
+    # default; use_jvp=True requires forward mode as well.
+    @jax.custom_vjp
+    def f(x):
+      return jnp.dot(x, x)
+    f.defvjp(lambda x: (f(x), x), lambda x, g: (2 * g * x,))
+    fp = lambda x: 2 * x
+    x = jnp.ones(5)
+    # The unit step overshoots the minimum at s = 1/3, so a zoom is needed.
+    p = -3 * jnp.ones(5)
+
+    for parallel_zoom in [False, True]:
+      res = line_search(f, x, p, parallel_zoom=parallel_zoom)
+      self.assertFalse(res.failed)
+      self.assert_line_wolfe(x, p, res.a_k, f, fp)
+      self.assertAllClose(res.g_k, fp(x + res.a_k * p), check_dtypes=False)
+      self.assertEqual(res.ngev, res.nfev)
+    with self.assertRaises(TypeError):
+      line_search(f, x, p, use_jvp=True)
+
+  def test_line_search_use_jvp(self):
+    f = lambda x: jnp.dot(x, x)
+    fp = lambda x: 2 * x
+    x = jnp.ones(5)
+    # The unit step overshoots the minimum at s = 1/3, so a zoom is needed.
+    p = -3 * jnp.ones(5)
+
+    for parallel_zoom in [False, True]:
+      res = line_search(f, x, p, parallel_zoom=parallel_zoom, use_jvp=True)
+      self.assertFalse(res.failed)
+      self.assert_line_wolfe(x, p, res.a_k, f, fp)
+      self.assertAllClose(res.g_k, fp(x + res.a_k * p), check_dtypes=False)
+      # One gradient at the start point and one at the accepted step.
+      self.assertEqual(res.ngev, 2)
+
+  def test_line_search_batched(self):
+    f = lambda x: jnp.dot(x, x)
+    fp = lambda x: 2 * x
+    xs = jnp.ones((3, 5))
+    # Minima along the directions are at s = 4, 1/3 and 1/10, so the batch
+    # mixes steps accepted while bracketing with steps found by zooming.
+    ps = -jnp.array([0.25, 3., 10.])[:, None] * jnp.ones((3, 5))
+
+    res = line_search_batched(f, xs, ps)
+    self.assertEqual(res.a_k.shape, (3,))
+    self.assertFalse(jnp.any(res.failed))
+    for x, p, s, f_k, g_k in zip(xs, ps, res.a_k, res.f_k, res.g_k):
+      self.assert_line_wolfe(x, p, s, f, fp)
+      self.assertAllClose(f_k, f(x + s * p), check_dtypes=False)
+      self.assertAllClose(g_k, fp(x + s * p), check_dtypes=False)
+
   # -- More specific tests
 
 
@@ -15,7 +15,7 @@
 
 import concurrent.futures
 from functools import partial
-import time
+import threading
 
 from absl.testing import absltest
 from absl.testing import parameterized
@@ -116,17 +116,21 @@ class X64ContextTests(jtu.JaxTestCase):
       self.assertArraysEqual(count_to(10), jnp.float32(10), check_dtypes=True)
 
   def test_thread_safety(self):
+    # Both threads wait inside their contexts until the other has entered its
+    # own, so the two settings are guaranteed to be live at the same time.
+    barrier = threading.Barrier(2)
+
     def func_x32():
       with disable_x64():
-        time.sleep(0.1)
+        barrier.wait(timeout=10)
         return jnp.arange(10).dtype
 
     def func_x64():
       with enable_x64():
-        time.sleep(0.1)
+        barrier.wait(timeout=10)
         return jnp.arange(10).dtype
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
       x32 = executor.submit(func_x32)
       x64 = executor.submit(func_x64)
       self.assertEqual(x64.result(), jnp.int64)